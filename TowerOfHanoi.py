@@ -1,108 +1,926 @@
 # -*- coding: utf-8 -*-
+import argparse
+import gzip
+import html
+import itertools
+import json
+import math
+import mmap
+import operator
+import os
+import queue
+import struct
 import sys
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+# tkinter is only imported for the GUI (see _load_tk), so the automaton
+# and the command line work on machines without a display
+tk = ttk = filedialog = messagebox = None
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized backend, pure Python otherwise
+    np = None
+
+
+# pegs supported by the k-peg (Frame-Stewart) variants, labelled A..H
+MAX_PEGS = 8
+
+# move labels shared by every sequence, indexed [src][dst]
+MOVE_LABELS = tuple(tuple(f"{chr(65+src)}->{chr(65+dst)}" for dst in range(MAX_PEGS)) for src in range(MAX_PEGS))
+
+
+# compact move encoding used by `validate_moves`: one byte src*3 + dst
+MOVE_CODES = {MOVE_LABELS[src][dst]: src * 3 + dst for src in range(3) for dst in range(3)}
+_CODE_PEGS = tuple(divmod(code, 3) for code in range(9))
+
+
+def _move_codes(pegs: int):
+    # label -> src*pegs + dst for `pegs` pegs (MOVE_CODES for three)
+    if pegs == 3:
+        return MOVE_CODES
+    return {MOVE_LABELS[src][dst]: src * pegs + dst for src in range(pegs) for dst in range(pegs)}
+
+
+def _move_code(mv, codes=MOVE_CODES):
+    # lenient parse of 'a -> c' style labels; None when not a move
+    try:
+        return codes.get(mv.replace(" ", "").strip().upper())
+    except AttributeError:
+        return None
+
+
+def encode_moves(moves, pegs: int = 3) -> bytes:
+    """Encode move strings like 'A->C' as bytes of src*pegs + dst codes."""
+    codes = _move_codes(pegs)
+    out = bytearray()
+    for mv in moves:
+        code = codes.get(mv)
+        if code is None:
+            code = _move_code(mv, codes)
+            if code is None:
+                raise ValueError(f"Movimiento inválido: '{mv}'")
+        out.append(code)
+    return bytes(out)
+
+
+# Result of `AutomataHanoiMatricial.validate_moves`. `first_illegal` is the
+# index of the first rejected move (None when all are legal) and `trace`
+# the packed code after every move, only when requested.
+MoveCheck = namedtuple("MoveCheck", "ok solved count first_illegal message trace")
+
+
+def _peg_bits(pegs: int) -> int:
+    # bits per disk in a packed code: 2 for up to four pegs, 3 up to eight
+    return max(2, (pegs - 1).bit_length())
+
+
+def pack_state(state) -> int:
+    """Pack a state (one tuple of disks per peg) into one integer.
+
+    With three or four pegs disk d occupies bits 2(d-1)..2(d-1)+1 and holds
+    its peg index; with more pegs each disk takes 3 bits.
+    """
+    bits = _peg_bits(len(state))
+    code = 0
+    for peg_idx, peg in enumerate(state):
+        for disk in peg:
+            code |= peg_idx << (bits * disk - bits)
+    return code
+
+
+def _pack_legal(state, n: int, pegs: int = 3):
+    """`pack_state` for a legal configuration of exactly disks 1..n, else None."""
+    bits = _peg_bits(pegs)
+    try:
+        seen = 0
+        code = 0
+        for peg_idx, peg in enumerate(state):
+            prev = n + 1
+            for disk in peg:
+                if not 0 < disk < prev or peg_idx >= pegs:
+                    return None
+                seen |= 1 << disk
+                code |= peg_idx << (bits * disk - bits)
+                prev = disk
+    except TypeError:
+        return None
+    return code if seen == (1 << (n + 1)) - 2 else None
+
+
+def unpack_state(code: int, n: int, pegs: int = 3):
+    """Inverse of `pack_state`: tuple of `pegs` tuples (bottom..top)."""
+    if pegs == 3:
+        stacks = ([], [], [])
+        for disk in range(n, 0, -1):
+            stacks[(code >> (2 * disk - 2)) & 3].append(disk)
+        return (tuple(stacks[0]), tuple(stacks[1]), tuple(stacks[2]))
+    bits = _peg_bits(pegs)
+    mask = (1 << bits) - 1
+    stacks = tuple([] for _ in range(pegs))
+    for disk in range(n, 0, -1):
+        stacks[(code >> (bits * disk - bits)) & mask].append(disk)
+    return tuple(map(tuple, stacks))
+
+
+# array typecode for each state word size of the binary format
+_TYPECODES = {array(t).itemsize: t for t in "BHILQ"}
+
+
+def _word_size(n: int, bits: int = 2) -> int:
+    # smallest word (1, 2, 4 or 8 bytes) holding `bits` bits per disk
+    return next(w for w in (1, 2, 4, 8) if bits * n <= 8 * w)
+
+
+def _norm_index(i, length):
+    # normalize a (possibly negative) index against `length`
+    if i < 0:
+        i += length
+    if not 0 <= i < length:
+        raise IndexError("index out of range")
+    return i
+
+
+class LazyStates(Sequence):
+    """Read-only view over the states of the optimal solution.
+
+    Each state is computed on demand from the step number (see
+    `AutomataHanoiMatricial.state_at`), so memory does not grow with n.
+    """
+
+    def __init__(self, automata):
+        self._automata = automata
+
+    def __len__(self):
+        return 1 << self._automata.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._automata.state_at(j) for j in range(*i.indices(len(self)))]
+        return self._automata.state_at(_norm_index(i, len(self)))
+
+    def __iter__(self):
+        return self._automata.iter_states()
+
+    def __contains__(self, value):
+        return self._automata.index_of(value) is not None
+
+    def index(self, value, start=0, stop=None):
+        idx = self._automata.index_of(value)
+        if idx is None or idx < start or (stop is not None and idx >= stop):
+            raise ValueError(f"{value!r} is not in states")
+        return idx
+
+
+class LazyMoves(Sequence):
+    """Read-only view over the move labels ('A->C', ...) of the optimal solution."""
+
+    def __init__(self, automata):
+        self._automata = automata
+
+    def __len__(self):
+        return (1 << self._automata.n) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._automata.move_at(j) for j in range(*i.indices(len(self)))]
+        return self._automata.move_at(_norm_index(i, len(self)))
+
+    def __iter__(self):
+        for _, src, dst in self._automata.iter_moves():
+            yield MOVE_LABELS[src][dst]
+
+
+class PackedStates(Sequence):
+    """Read-only view of states stored as packed codes (see `pack_state`).
+
+    `codes` is any indexable of integers, e.g. an `array('Q')` or a
+    memoryview over a mapped file. Entries are unpacked to tuples of
+    `pegs` pegs on access; `index` and `in` pack the probe instead and
+    compare integers, or ask `locate(state) -> index or None` when given.
+    """
+
+    def __init__(self, codes, n: int, locate=None, pegs: int = 3):
+        self.codes = codes
+        self.n = n
+        self.locate = locate
+        self.pegs = pegs
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [unpack_state(c, self.n, self.pegs) for c in self.codes[i]]
+        return unpack_state(self.codes[i], self.n, self.pegs)
+
+    def __iter__(self):
+        n, pegs = self.n, self.pegs
+        for c in self.codes:
+            yield unpack_state(c, n, pegs)
+
+    def __contains__(self, value):
+        if self.locate is not None:
+            return self.locate(value) is not None
+        code = _pack_legal(value, self.n, self.pegs)
+        return code is not None and code in self.codes
+
+    def index(self, value, start=0, stop=None):
+        if self.locate is not None:
+            idx = self.locate(value)
+            if idx is None or idx < start or (stop is not None and idx >= stop):
+                raise ValueError(f"{value!r} is not in states")
+            return idx
+        if start or stop is not None:
+            return super().index(value, start, stop)
+        code = _pack_legal(value, self.n, self.pegs)
+        if code is not None:
+            try:
+                return self.codes.index(code)
+            except ValueError:
+                pass
+        raise ValueError(f"{value!r} is not in states")
+
+
+class PackedMoves(Sequence):
+    """Move labels derived from consecutive packed state codes."""
+
+    def __init__(self, codes, bits: int = 2):
+        self.codes = codes
+        self.bits = bits
+
+    def __len__(self):
+        return max(0, len(self.codes) - 1)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = _norm_index(i, len(self))
+        return _move_label(self.codes[i], self.codes[i + 1], self.bits)
+
+
+def _moved_disk(before: int, after: int, bits: int = 2):
+    # (disk, src, dst) of the move between two packed codes: the only
+    # field that differs is the disk that moved
+    diff = before ^ after
+    shift = ((diff & -diff).bit_length() - 1) // bits * bits
+    mask = (1 << bits) - 1
+    return shift // bits + 1, (before >> shift) & mask, (after >> shift) & mask
+
+
+def _move_label(before: int, after: int, bits: int = 2) -> str:
+    _, src, dst = _moved_disk(before, after, bits)
+    return MOVE_LABELS[src][dst]
+
+
+# Whole-solution tables: per-move `disk`, `src`, `dst` (2^n - 1 entries),
+# per-step `pegs[i][d-1]` = peg of disk d and packed `codes` (2^n entries).
+# NumPy arrays with the NumPy backend, `array`/`bytes` rows otherwise.
+SolutionArrays = namedtuple("SolutionArrays", "disk src dst pegs codes")
+
+
+def _np_peg_column(n: int, disk: int, dtype, shift: int = 0):
+    # peg of `disk` at every step (closed form of AutomataHanoiMatricial.peg_of):
+    # a 3-peg cycle, each value held for 2^disk steps, offset by 2^(disk-1)
+    half = 1 << (disk - 1)
+    cycle = (0, 1, 2) if (n - disk) & 1 else (0, 2, 1)
+    period = np.repeat(np.array([p << shift for p in cycle], dtype=dtype), 2 * half)
+    reps = ((1 << n) + half) // len(period) + 1
+    return np.tile(period, reps)[half:half + (1 << n)]
+
+
+def _np_solution(n: int, with_pegs: bool = True):
+    # vectorized pegs matrix and packed codes over all steps
+    pegs = np.empty((1 << n, n), dtype=np.uint8) if with_pegs else None
+    codes = np.zeros(1 << n, dtype=np.uint64)
+    for disk in range(1, n + 1):
+        codes |= _np_peg_column(n, disk, np.uint64, 2 * disk - 2)
+        if with_pegs:
+            pegs[:, disk - 1] = _np_peg_column(n, disk, np.uint8)
+    return pegs, codes
+
+
+def _open_output(path: str, compress=None):
+    """Open `path` for buffered text writing, gzip-compressed if requested.
+
+    `compress=None` compresses when the name ends in '.gz'.
+    """
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+
+
+def _write_chunked(f, pieces, chunk: int = 65536, progress=None, total=None):
+    """Write the strings from `pieces` to `f`, joined `chunk` at a time.
+
+    `progress(done, total)` is called after every chunk with the number of
+    pieces written so far.
+    """
+    buf = []
+    done = 0
+    for piece in pieces:
+        buf.append(piece)
+        if len(buf) >= chunk:
+            f.write("".join(buf))
+            done += len(buf)
+            buf.clear()
+            if progress:
+                progress(done, total)
+    f.write("".join(buf))
+    if progress:
+        progress(done + len(buf), total)
+
+
+class JobCancelled(Exception):
+    """Raised by a progress callback to abort a long build or export."""
+
+
+def _fill_codes(codes, source, total, progress=None, chunk: int = 1 << 16):
+    # extend `codes` from the iterator `source`, reporting progress per chunk
+    if progress is None:
+        codes.extend(source)
+        return codes
+    while True:
+        size = len(codes)
+        codes.extend(itertools.islice(source, chunk))
+        progress(len(codes), total)
+        if len(codes) - size < chunk:
+            return codes
+
+
+def _iter_moves3(m: int, src: int, dst: int, aux: int, offset: int = 0):
+    # optimal 3-peg moves of disks offset+1..offset+m from `src` to `dst`,
+    # iterative like AutomataHanoiMatricial.iter_moves
+    labels = (src, aux, dst)
+    pos = [0] * (m + 1)
+    nxt = [None] + [(1, 2, 0) if (m - d) & 1 else (2, 0, 1) for d in range(1, m + 1)]
+    for step in range(1, 1 << m):
+        disk = (step & -step).bit_length()
+        s = pos[disk]
+        t = pos[disk] = nxt[disk][s]
+        yield offset + disk, labels[s], labels[t]
+
+
+class FrameStewart:
+    """Frame-Stewart solutions of the k-peg Tower of Hanoi.
+
+    To move m disks with k pegs, park the t smallest on an intermediate
+    peg (using all k pegs), move the other m-t with the k-1 pegs left,
+    then bring the t back on top. `moves(m, k)` is the minimum over t of
+    2*moves(t, k) + moves(m-t, k-1); with three pegs it is 2^m - 1.
+
+    The cost and best-split tables are class-level and grow on demand, so
+    they are shared by every automaton and reused across n and k.
+    """
+
+    # k -> (cost list, split list), both indexed by the number of disks
+    _tables = {}
+
+    @classmethod
+    def _table(cls, n: int, k: int):
+        cost, split = cls._tables.setdefault(k, ([0, 1], [0, 0]))
+        if len(cost) > n:
+            return cost, split
+        if k == 3:
+            for m in range(len(cost), n + 1):
+                cost.append((1 << m) - 1)
+                split.append(m - 1)
+            return cost, split
+        fewer = cls._table(n, k - 1)[0]
+        for m in range(len(cost), n + 1):
+            best, best_t = None, 0
+            for t in range(1, m):
+                c = 2 * cost[t] + fewer[m - t]
+                if best is None or c < best:
+                    best, best_t = c, t
+            cost.append(best)
+            split.append(best_t)
+        return cost, split
+
+    @classmethod
+    def moves(cls, n: int, k: int) -> int:
+        """Number of moves of the Frame-Stewart solution (n disks, k pegs)."""
+        if k < 3:
+            raise ValueError("pegs must be >= 3")
+        return cls._table(n, k)[0][n]
+
+    @classmethod
+    def split(cls, n: int, k: int) -> int:
+        """How many of the smallest disks are parked first."""
+        return cls._table(n, k)[1][n]
+
+    @classmethod
+    def clear(cls):
+        """Drop the memoized tables (e.g. before timing their computation)."""
+        cls._tables.clear()
+
+    @classmethod
+    def iter_moves(cls, n: int, k: int, src: int = 0, dst=None):
+        """Yield (disk, src, dst) for every move, from peg `src` to `dst` (default: last)."""
+        dst = k - 1 if dst is None else dst
+        cls.moves(n, k)
+        # explicit stack of (offset, disks, pegs available, src, dst); the
+        # sub-problem covers disks offset+1..offset+disks
+        stack = [(0, n, tuple(range(k)), src, dst)]
+        while stack:
+            offset, m, avail, s, d = stack.pop()
+            if m == 0:
+                continue
+            if len(avail) == 3:
+                aux = next(p for p in avail if p != s and p != d)
+                yield from _iter_moves3(m, s, d, aux, offset)
+                continue
+            t = cls.split(m, len(avail))
+            mid = next(p for p in avail if p != s and p != d)
+            # pushed in reverse order of execution
+            stack.append((offset, t, avail, mid, d))
+            stack.append((offset + t, m - t, tuple(p for p in avail if p != mid), s, d))
+            stack.append((offset, t, avail, s, mid))
+
+
 # Inlined AutomataHanoiMatricial so the project is a single-file script
 class AutomataHanoiMatricial:
     """Minimal automaton implementation for Towers of Hanoi.
+
+    States are kept as packed integer codes in `self.codes` (an
+    `array('Q')`, see `pack_state`) and `states`/`sequence` are read-only
+    views over them. With `lazy=True` nothing is stored and every entry is
+    computed on demand instead. `lazy=None` picks lazy mode automatically
+    above `LAZY_THRESHOLD` disks.
+
+    With `pegs` > 3 the solution is the Frame-Stewart one (see
+    `FrameStewart`); it has no closed form, so it is always stored.
+    `progress(done, total)` is called while the table is built (it may
+    raise `JobCancelled` to abort).
     """
 
-    def __init__(self, n_disks: int):
+    LAZY_THRESHOLD = 16
+    # packed codes must fit in an unsigned 64-bit word
+    MAX_PACKED_DISKS = 32
+    # len() of the lazy views (2^n states) must fit in a signed 64-bit size
+    MAX_LAZY_DISKS = 62
+    pegs = 3
+    bits = 2
+
+    def __init__(self, n_disks: int, lazy=None, pegs: int = 3, progress=None):
         if n_disks < 1:
             raise ValueError("n_disks must be >= 1")
+        if not 3 <= pegs <= MAX_PEGS:
+            raise ValueError(f"pegs must be between 3 and {MAX_PEGS}")
         self.n = n_disks
-        self.states = []
-        self.sequence = []
+        self.pegs = pegs
+        self.bits = _peg_bits(pegs)
+        if pegs > 3:
+            if lazy:
+                raise ValueError("lazy mode requires 3 pegs")
+            lazy = False
+        if lazy is None:
+            lazy = n_disks > self.LAZY_THRESHOLD
+        self.lazy = lazy
+        if lazy:
+            if n_disks > self.MAX_LAZY_DISKS:
+                raise ValueError(f"n_disks must be <= {self.MAX_LAZY_DISKS}")
+            self.codes = None
+            self.states = LazyStates(self)
+            self.sequence = LazyMoves(self)
+            return
+        if pegs == 3 and n_disks > self.MAX_PACKED_DISKS:
+            raise ValueError(f"n_disks > {self.MAX_PACKED_DISKS} requires lazy=True")
         # build states and sequence
-        self._build()
-
-    def _build(self):
-        # pegs as lists; top is at the end
-        pegs = [list(range(self.n, 0, -1)), [], []]
-        # record initial state
-        self.states = [self._snapshot(pegs)]
-        self.sequence = []
-
-        def move(k, src, dst, aux):
-            if k == 0:
-                return
-            if k == 1:
-                disk = pegs[src].pop()
-                pegs[dst].append(disk)
-                self.sequence.append(f"{chr(65+src)}->{chr(65+dst)}")
-                self.states.append(self._snapshot(pegs))
-                return
-            move(k-1, src, aux, dst)
-            move(1, src, dst, aux)
-            move(k-1, aux, dst, src)
+        self._build(progress)
+
+    def _build(self, progress=None):
+        total = self._state_count()
+        if self.pegs > 3:
+            codes = array('Q') if self.n * self.bits <= 64 else []
+            self.codes = _fill_codes(codes, self._frame_stewart_codes(), total, progress)
+        elif np is not None:
+            self.codes = array('Q', _np_solution(self.n, with_pegs=False)[1].tobytes())
+            if progress:
+                progress(total, total)
+        else:
+            self.codes = _fill_codes(array('Q'), self.iter_codes(), total, progress)
+        self._wrap_codes()
+
+    def _frame_stewart_codes(self):
+        # packed codes along the Frame-Stewart move stream (stored in a
+        # plain list of ints when they do not fit in 64 bits)
+        bits = self.bits
+        code = 0
+        yield code
+        for disk, src, dst in FrameStewart.iter_moves(self.n, self.pegs):
+            code += (dst - src) << (bits * disk - bits)
+            yield code
+
+    def _wrap_codes(self):
+        self.states = PackedStates(self.codes, self.n, self.index_of, self.pegs)
+        self.sequence = PackedMoves(self.codes, self.bits)
+        # code -> step, built on first use of index_of with more than 3 pegs
+        self._index = None
+
+    @classmethod
+    def _from_codes(cls, n: int, codes, pegs: int = 3):
+        # wrap an existing table of packed codes (e.g. a mapped binary file)
+        self = cls.__new__(cls)
+        self.n = n
+        self.pegs = pegs
+        self.bits = _peg_bits(pegs)
+        self.lazy = False
+        self.codes = codes
+        self._wrap_codes()
+        return self
+
+    # --- binary solution files ---
+    # Header (little-endian): magic, format version, n, bytes per state
+    # word, number of states; version 2 (more than three pegs) adds one
+    # byte with the number of pegs. Then one packed code per step, padded
+    # to the smallest of 1/2/4/8 bytes that holds its bits.
+    BINARY_MAGIC = b"HANOIBIN"
+    BINARY_VERSION = 1
+    _BINARY_HEADER = struct.Struct("<8sHBBQ")
+    _BINARY_PEGS = struct.Struct("<B")
+
+    def export_binary(self, path: str, chunk: int = 1 << 16, progress=None):
+        """Write the packed state table to a binary file (see `load_binary`).
+
+        `progress(done, total)` is called after every `chunk` states.
+        """
+        n = self.n
+        if n * self.bits > 64:
+            raise ValueError(f"binary format supports at most {64 // self.bits} disks")
+        word = _word_size(n, self.bits)
+        typecode = _TYPECODES[word]
+        count = len(self.states)
+        source = self.codes if self.codes is not None else self.iter_codes()
+        it = iter(source)
+        done = 0
+        with open(path, "wb") as f:
+            if self.pegs == 3:
+                f.write(self._BINARY_HEADER.pack(self.BINARY_MAGIC, self.BINARY_VERSION, n, word, count))
+            else:
+                f.write(self._BINARY_HEADER.pack(self.BINARY_MAGIC, 2, n, word, count))
+                f.write(self._BINARY_PEGS.pack(self.pegs))
+            while True:
+                block = array(typecode, itertools.islice(it, chunk))
+                if not block:
+                    break
+                if sys.byteorder != "little":
+                    block.byteswap()
+                f.write(block.tobytes())
+                done += len(block)
+                if progress:
+                    progress(done, count)
+
+    @classmethod
+    def load_binary(cls, path: str):
+        """Open a file written by `export_binary` without parsing it.
+
+        The file is memory-mapped and `states[i]` reads the i-th word in
+        place, so opening is instant regardless of n.
+        """
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = cls._BINARY_HEADER
+        if len(mapping) < header.size:
+            raise ValueError("not a Hanoi binary file")
+        magic, version, n, word, count = header.unpack_from(mapping)
+        if magic != cls.BINARY_MAGIC or version not in (1, 2):
+            raise ValueError("not a Hanoi binary file")
+        offset, pegs = header.size, 3
+        if version == 2:
+            if len(mapping) < offset + cls._BINARY_PEGS.size:
+                raise ValueError("corrupt Hanoi binary file")
+            pegs, = cls._BINARY_PEGS.unpack_from(mapping, offset)
+            offset += cls._BINARY_PEGS.size
+            if not 3 < pegs <= MAX_PEGS:
+                raise ValueError("corrupt Hanoi binary file")
+        expected = FrameStewart.moves(n, pegs) + 1 if pegs > 3 else 1 << n
+        if word != _word_size(n, _peg_bits(pegs)) or count != expected or len(mapping) < offset + count * word:
+            raise ValueError("corrupt Hanoi binary file")
+        typecode = _TYPECODES[word]
+        body = memoryview(mapping)[offset:offset + count * word]
+        if sys.byteorder == "little":
+            codes = body.cast(typecode)
+        else:
+            codes = array(typecode, body.tobytes())
+            codes.byteswap()
+        self = cls._from_codes(n, codes, pegs)
+        # the mapping must stay open for as long as `codes` is used
+        self._mapping = mapping
+        return self
+
+    def solution_arrays(self) -> SolutionArrays:
+        """Whole solution as flat arrays (see `SolutionArrays`).
+
+        Uses NumPy vectorized over every step when available and falls back
+        to the iterative generators otherwise.
+        """
+        n = self.n
+        if np is not None and self.pegs == 3:
+            pegs, codes = _np_solution(n)
+            steps = np.arange(1, 1 << n, dtype=np.uint64)
+            lowest = steps & (~steps + np.uint64(1))
+            disk = np.log2(lowest.astype(np.float64)).astype(np.intp) + 1
+            src = pegs[np.arange(len(steps)), disk - 1]
+            dst = pegs[np.arange(1, len(steps) + 1), disk - 1]
+            return SolutionArrays(disk.astype(np.uint8), src, dst, pegs, codes)
+        disk, src, dst = array('B'), array('B'), array('B')
+        for d, s, t in self.iter_moves():
+            disk.append(d)
+            src.append(s)
+            dst.append(t)
+        bits = self.bits
+        mask = (1 << bits) - 1
+        codes = array('Q', self.iter_codes()) if n * bits <= 64 else list(self.iter_codes())
+        pegs = [bytes((c >> (bits * i)) & mask for i in range(n)) for c in codes]
+        return SolutionArrays(disk, src, dst, pegs, codes)
+
+    def iter_moves(self, start: int = 0, stop=None):
+        """Yield (disk, src, dst) for moves `start`..`stop`-1 of the optimal solution.
+
+        Iterative: the disk moved at step m is given by the lowest set bit
+        of m and each disk always advances its peg in a fixed direction, so
+        only the current peg of every disk is kept.
+        """
+        n = self.n
+        total = self._state_count() - 1
+        stop = total if stop is None else min(stop, total)
+        if self.pegs > 3:
+            yield from self._iter_table_moves(start, stop)
+            return
+        # current peg of each disk (index 0 unused) and its successor table
+        pos = [0] + [self.peg_of(d, start) for d in range(1, n + 1)]
+        nxt = [None] + [(1, 2, 0) if (n - d) & 1 else (2, 0, 1) for d in range(1, n + 1)]
+        for step in range(start + 1, stop + 1):
+            disk = (step & -step).bit_length()
+            src = pos[disk]
+            dst = pos[disk] = nxt[disk][src]
+            yield disk, src, dst
+
+    def _state_count(self) -> int:
+        # 2^n with three pegs, one more than the Frame-Stewart moves otherwise
+        return FrameStewart.moves(self.n, self.pegs) + 1 if self.pegs > 3 else 1 << self.n
+
+    def _iter_table_moves(self, start, stop):
+        # moves read back from the stored codes (solutions without a closed form)
+        codes, bits = self.codes, self.bits
+        for i in range(start, stop):
+            yield _moved_disk(codes[i], codes[i + 1], bits)
+
+    def iter_codes(self, start: int = 0, stop=None):
+        """Like `iter_states` but yields packed codes (see `pack_state`)."""
+        total = self._state_count()
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            return
+        bits = self.bits
+        code = self.code_at(start)
+        yield code
+        for disk, src, dst in self.iter_moves(start, stop - 1):
+            code += (dst - src) << (bits * disk - bits)
+            yield code
+
+    def iter_states(self, start: int = 0, stop=None, snapshot: bool = True):
+        """Yield the states `start`..`stop`-1 of the optimal solution.
+
+        With `snapshot=False` the same list of three peg lists is yielded
+        every time, updated in place; copy it if it must outlive the step.
+        """
+        total = self._state_count()
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            return
+        pegs = [list(peg) for peg in self.state_at(start)]
+        yield self._snapshot(pegs) if snapshot else pegs
+        for disk, src, dst in self.iter_moves(start, stop - 1):
+            pegs[src].pop()
+            pegs[dst].append(disk)
+            yield self._snapshot(pegs) if snapshot else pegs
+
+    # --- closed form of the optimal solution ---
+    # Disk d (1 = smallest) moves on every step whose lowest set bit is
+    # bit d-1, always cycling in the same direction: A->C->B->A when n-d is
+    # even, A->B->C->A when it is odd. So after `step` moves it has moved
+    # (step + 2^(d-1)) >> d times and its peg follows directly.
+    # With more pegs these read the stored table instead.
+    def peg_of(self, disk: int, step: int) -> int:
+        """Peg index of `disk` after `step` moves of the optimal solution."""
+        if self.pegs > 3:
+            return (self.codes[step] >> (self.bits * disk - self.bits)) & ((1 << self.bits) - 1)
+        direction = 1 if (self.n - disk) & 1 else 2
+        return (((step + (1 << (disk - 1))) >> disk) * direction) % 3
+
+    def state_at(self, step: int):
+        """State after `step` moves, as a tuple of per-peg tuples (bottom..top)."""
+        if self.pegs > 3:
+            return unpack_state(self.codes[step], self.n, self.pegs)
+        pegs = ([], [], [])
+        for disk in range(self.n, 0, -1):
+            pegs[self.peg_of(disk, step)].append(disk)
+        return (tuple(pegs[0]), tuple(pegs[1]), tuple(pegs[2]))
 
-        move(self.n, 0, 2, 1)
+    def code_at(self, step: int) -> int:
+        """Packed code (see `pack_state`) of the state after `step` moves."""
+        if self.pegs > 3:
+            return self.codes[step]
+        code = 0
+        for disk in range(1, self.n + 1):
+            code |= self.peg_of(disk, step) << (2 * disk - 2)
+        return code
+
+    def index_of(self, state):
+        """Step at which `state` occurs on the optimal path, or None.
+
+        `state` is a tuple-of-tuples (or list of lists) or a packed code.
+        O(n): walking from the largest disk down, a disk still on the
+        source peg means the first half of its sub-solution, on the
+        destination peg the second half (adding 2^(d-1) steps), and on the
+        auxiliary peg that the state is off the path. With more than three
+        pegs there is no such walk and a code -> step dict is used.
+        """
+        n = self.n
+        code = state if isinstance(state, int) else _pack_legal(state, n, self.pegs)
+        if code is None or code >> (self.bits * n):
+            return None
+        if self.pegs > 3:
+            if self._index is None:
+                self._index = {c: i for i, c in enumerate(self.codes)}
+            return self._index.get(code)
+        step = 0
+        src, dst, aux = 0, 2, 1
+        for disk in range(n, 0, -1):
+            peg = (code >> (2 * disk - 2)) & 3
+            if peg == src:
+                dst, aux = aux, dst
+            elif peg == dst:
+                step += 1 << (disk - 1)
+                src, aux = aux, src
+            else:
+                return None
+        return step
+
+    # --- optimal moves from any configuration ---
+    # Walking from the largest disk down with target peg C: a disk already
+    # on the target stays, and smaller disks keep that target; a disk off
+    # it must move there once (2^(d-1) moves including re-stacking the
+    # smaller disks on top), and the smaller disks must first gather on the
+    # third peg, which becomes their target. The distance is the sum over
+    # those misplaced disks; the smallest of them can move right away.
+    def _misplaced(self, state):
+        # [(disk, src, target)] for every disk that must move, largest first
+        n = self.n
+        code = state if isinstance(state, int) else _pack_legal(state, n, self.pegs)
+        # a 2-bit field of 3 names no peg: code & code >> 1 has the low bit
+        # of such a field set, and (4^n - 1) // 3 masks those bits
+        if code is None or code >> (self.bits * n) or code & (code >> 1) & ((1 << 2 * n) - 1) // 3:
+            raise ValueError(f"{state!r} is not a configuration of {n} disks")
+        plan = []
+        target = 2
+        for disk in range(n, 0, -1):
+            peg = (code >> (2 * disk - 2)) & 3
+            if peg != target:
+                plan.append((disk, peg, target))
+                target = 3 - peg - target
+        return plan
+
+    def _path_index(self, state):
+        # position on the stored path (variants without the closed walk)
+        idx = self.index_of(state)
+        if idx is None:
+            raise ValueError(f"{state!r} is not on the {self.pegs}-peg solution; hints need 3 pegs off it")
+        return idx
+
+    def distance_to_goal(self, state) -> int:
+        """Minimum number of moves from `state` (tuple of pegs or packed code) to the goal. O(n)."""
+        if self.pegs > 3:
+            return len(self.states) - 1 - self._path_index(state)
+        return sum(1 << (disk - 1) for disk, _, _ in self._misplaced(state))
+
+    def next_move(self, state):
+        """Optimal next move (disk, src, dst) from `state`, or None when solved. O(n)."""
+        if self.pegs > 3:
+            idx = self._path_index(state)
+            return next(self.iter_moves(idx, idx + 1), None)
+        plan = self._misplaced(state)
+        return plan[-1] if plan else None
+
+    def solve_from(self, state):
+        """Yield the optimal moves (disk, src, dst) from `state` to the goal."""
+        if self.pegs > 3:
+            yield from self.iter_moves(self._path_index(state))
+            return
+        # smallest misplaced disk first: move it, then bring the smaller
+        # disks (gathered on the third peg) back on top of it
+        for disk, src, dst in reversed(self._misplaced(state)):
+            yield disk, src, dst
+            yield from _iter_moves3(disk - 1, 3 - src - dst, dst, src)
+
+    def move_at(self, index: int) -> str:
+        """Label of the move taking state `index` to state `index + 1`."""
+        if self.pegs > 3:
+            return _move_label(self.codes[index], self.codes[index + 1], self.bits)
+        step = index + 1
+        disk = (step & -step).bit_length()
+        src = self.peg_of(disk, index)
+        dst = self.peg_of(disk, step)
+        return MOVE_LABELS[src][dst]
 
     def _snapshot(self, pegs):
         # store peg contents as tuples (bottom...top)
-        return (tuple(pegs[0]), tuple(pegs[1]), tuple(pegs[2]))
-
-    def export_csv(self, path: str):
-        """Export states to a simple CSV: index, pegA, pegB, pegC"""
-        import csv
-        rows = []
-        for i, st in enumerate(self.states):
-            rows.append((i, "-".join(map(str, st[0])), "-".join(map(str, st[1])), "-".join(map(str, st[2]))))
-        with open(path, "w", newline='', encoding='utf-8') as f:
-            w = csv.writer(f)
-            w.writerow(["index", "pegA", "pegB", "pegC"])
-            for r in rows:
-                w.writerow(r)
-
-    def export_jflap(self, path: str):
+        if len(pegs) == 3:
+            return (tuple(pegs[0]), tuple(pegs[1]), tuple(pegs[2]))
+        return tuple(map(tuple, pegs))
+
+    def export_csv(self, path: str, start: int = 0, stop=None, step: int = 1,
+                   compress=None, chunk_rows: int = 65536, progress=None):
+        """Export states to a simple CSV: index, pegA, pegB, pegC (one column per peg)
+
+        Rows are streamed from the solution and written `chunk_rows` at a
+        time, so memory does not grow with the number of states.
+        `start`/`stop`/`step` select steps like a slice. The file is
+        gzip-compressed when `compress` is true or, by default, when `path`
+        ends in '.gz'. `progress(rows, total_rows)` is called per chunk.
+        """
+        if step < 1:
+            raise ValueError("step must be >= 1")
+        start, stop, step = slice(start, stop, step).indices(len(self.states))
+        rows = len(range(start, stop, step))
+        with _open_output(path, compress) as f:
+            f.write("index," + ",".join(f"peg{chr(65+p)}" for p in range(self.pegs)) + "\r\n")
+            _write_chunked(f, self._iter_csv_rows(start, stop, step), chunk_rows, progress, rows)
+
+    def _iter_csv_rows(self, start, stop, step):
+        # one "index,pegA,pegB,pegC\r\n" line per selected step
+        if start >= stop:
+            return
+        if step > 1:
+            for i in range(start, stop, step):
+                cells = ",".join("-".join(map(str, peg)) for peg in self.state_at(i))
+                yield f"{i},{cells}\r\n"
+            return
+        # consecutive steps: only the two pegs touched by a move change, and
+        # only at their top (end of the string)
+        pegs = ["-".join(map(str, peg)) for peg in self.state_at(start)]
+        yield f"{start},{','.join(pegs)}\r\n"
+        i = start
+        for disk, src, dst in self.iter_moves(start, stop - 1):
+            i += 1
+            text = pegs[src]
+            pegs[src] = text[:text.rfind("-")] if "-" in text else ""
+            pegs[dst] = f"{pegs[dst]}-{disk}" if pegs[dst] else str(disk)
+            yield f"{i},{','.join(pegs)}\r\n"
+
+    def export_jflap(self, path: str, compress=None, chunk: int = 65536, progress=None):
         """Export the automaton as a JFLAP-compatible .jff file.
 
         The output matches the requested compact format with a <structure>
         element, <type>fa</type>, and an <automaton> containing <state>
         elements with <x>/<y> coordinates and <transition> entries.
-        """
-        import html
 
+        The XML is streamed to the file from the move generator, `chunk`
+        fragments at a time, so memory stays constant for any n. Compressed
+        like `export_csv`. `progress(fragments, total_fragments)` is called
+        per chunk. Returns the number of states written.
+        """
         total = len(self.states)
+        with _open_output(path, compress) as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write("<structure><type>fa</type><automaton>")
+            _write_chunked(f, self._iter_jflap_fragments(total), chunk, progress, 2 * total - 1)
+            f.write("</automaton></structure>\n")
+        return total
+
+    def _iter_jflap_fragments(self, total):
         # layout parameters (mirror example): start x=150, spacing=120, y=200
         x_start = 150
         x_spacing = 120
         y_coord = 200
 
-        parts = []
-        parts.append("<?xml version='1.0' encoding='utf-8'?>\n")
-        parts.append("<structure>")
-        parts.append("<type>fa</type>")
-        parts.append("<automaton>")
-
         # states
         for i in range(total):
-            name = f"S{i}"
-            x = x_start + i * x_spacing
-            parts.append(f"<state id=\"{i}\" name=\"{name}\">")
-            parts.append(f"<x>{x}</x>")
-            parts.append(f"<y>{y_coord}</y>")
+            extra = ""
             if i == 0:
-                parts.append("<initial />")
+                extra += "<initial />"
             if i == total - 1:
-                parts.append("<final />")
-            parts.append("</state>")
-
-        # transitions: assume linear transitions matching self.sequence
-        for i, mv in enumerate(self.sequence):
-            # escape for XML (convert '>' to &gt; etc.)
-            read = html.escape(mv)
-            parts.append("<transition>")
-            parts.append(f"<from>{i}</from>")
-            parts.append(f"<to>{i+1}</to>")
-            parts.append(f"<read>{read}</read>")
-            parts.append("</transition>")
-
-        parts.append("</automaton>")
-        parts.append("</structure>\n")
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("".join(parts))
+                extra += "<final />"
+            yield (f"<state id=\"{i}\" name=\"S{i}\"><x>{x_start + i * x_spacing}</x>"
+                   f"<y>{y_coord}</y>{extra}</state>")
+
+        # transitions: linear, one per move of the solution
+        # escape labels for XML (convert '>' to &gt; etc.)
+        reads = [[html.escape(label) for label in row] for row in MOVE_LABELS]
+        i = 0
+        for _, src, dst in self.iter_moves():
+            yield f"<transition><from>{i}</from><to>{i+1}</to><read>{reads[src][dst]}</read></transition>"
+            i += 1
 
     def simulate_manual(self, moves_list):
         """Simulate a list of moves like ['A->C', 'A->B'].
@@ -110,7 +928,7 @@ class AutomataHanoiMatricial:
         Returns: (ok: bool, message: str, trace: list[(state_str, move_str)])
         """
         # copy initial pegs
-        pegs = [list(range(self.n, 0, -1)), [], []]
+        pegs = [list(range(self.n, 0, -1))] + [[] for _ in range(self.pegs - 1)]
         trace = [(self._state_str(pegs), "start")]
         for mv in moves_list:
             mv = mv.strip()
@@ -122,7 +940,7 @@ class AutomataHanoiMatricial:
                 dst = ord(dst_c.strip().upper()) - 65
             except Exception:
                 return False, f"Movimiento inválido: '{mv}'", trace
-            if src not in (0,1,2) or dst not in (0,1,2):
+            if not 0 <= src < self.pegs or not 0 <= dst < self.pegs:
                 return False, f"Pilon desconocido en movimiento: '{mv}'", trace
             if not pegs[src]:
                 return False, f"Pilon {src_c} está vacío: {mv}", trace
@@ -134,11 +952,1284 @@ class AutomataHanoiMatricial:
             trace.append((self._state_str(pegs), mv))
         return True, "Simulación completada", trace
 
+    def validate_moves(self, moves, trace: bool = False) -> MoveCheck:
+        """Fast check of a move sequence from the initial state.
+
+        `moves` is a bytes-like object or array (including NumPy arrays) of
+        src*pegs + dst codes (see `encode_moves`), or any iterable of such
+        integers or of 'A->C' strings, consumed as a stream. Stops at the
+        first illegal move. Pegs are kept as disk bitmasks, so a move costs
+        a few integer operations; the packed-code trace is only built when
+        `trace` is true.
+        """
+        n = self.n
+        # bit d-1 set when disk d is on the peg
+        masks = [(1 << n) - 1] + [0] * (self.pegs - 1)
+        labels = _move_codes(self.pegs)
+        code_pegs = _CODE_PEGS if self.pegs == 3 else tuple(divmod(c, self.pegs) for c in range(self.pegs ** 2))
+        bits = self.bits
+        codes = [] if trace else None
+        code = 0
+        count = 0
+        if np is not None and isinstance(moves, np.ndarray) and moves.ndim == 1 and moves.dtype.kind in "iu":
+            # iterating a memoryview yields plain ints without copying
+            moves = memoryview(np.ascontiguousarray(moves))
+        for mv in moves:
+            if mv.__class__ is not int:
+                try:
+                    mv = operator.index(mv)  # NumPy and other integral scalars
+                except TypeError:
+                    label = mv
+                    mv = labels.get(label)
+                    if mv is None:
+                        mv = _move_code(label, labels)
+                        if mv is None:
+                            return MoveCheck(False, False, count, count, f"Movimiento inválido: '{label}'", codes)
+            if not 0 <= mv < len(code_pegs):
+                return MoveCheck(False, False, count, count, f"Código de movimiento inválido: {mv}", codes)
+            src, dst = code_pegs[mv]
+            top = masks[src] & -masks[src]
+            if not top:
+                return MoveCheck(False, False, count, count, f"Pilon {chr(65+src)} está vacío", codes)
+            under = masks[dst] & -masks[dst]
+            if under and under < top:
+                return MoveCheck(False, False, count, count,
+                                 f"Movimiento ilegal: no se puede poner disco {top.bit_length()} "
+                                 f"sobre disco {under.bit_length()}", codes)
+            masks[src] ^= top
+            masks[dst] |= top
+            count += 1
+            if trace:
+                shift = bits * top.bit_length() - bits
+                code += (dst - src) << shift
+                codes.append(code)
+        solved = masks[-1] == (1 << n) - 1
+        return MoveCheck(True, solved, count, None, "Simulación completada", codes)
+
     def _state_str(self, pegs):
-        return f"A:{pegs[0]} B:{pegs[1]} C:{pegs[2]}"
+        return " ".join(f"{chr(65+i)}:{peg}" for i, peg in enumerate(pegs))
+
+# --- relabelling packed 3-peg codes ---
+# The optimal n-disk solution moves disks 1..n-1 from A to B (the n-1
+# solution with pegs B and C swapped), moves disk n from A to C, and moves
+# disks 1..n-1 from B to C (the n-1 solution with A and B swapped). On the
+# 2-bit fields these swaps are bit tricks: B<->C exchanges the two bits of
+# every field, A<->B flips the low bit of fields whose high bit is clear.
+
+def _relabel_codes(codes, n: int, swap: str):
+    """Packed codes of `n` disks with pegs swapped ('BC' or 'AB')."""
+    low = int("01" * n, 2)
+    if np is not None:
+        c = np.frombuffer(codes, dtype=np.uint64) if isinstance(codes, array) else np.asarray(codes, dtype=np.uint64)
+        lo = np.uint64(low)
+        if swap == "BC":
+            return ((c & lo) << np.uint64(1)) | ((c >> np.uint64(1)) & lo)
+        return c ^ (~(c >> np.uint64(1)) & lo)
+    if swap == "BC":
+        return array('Q', [((c & low) << 1) | ((c >> 1) & low) for c in codes])
+    return array('Q', [c ^ (~(c >> 1) & low) for c in codes])
+
+
+def _extend_codes(codes, n: int):
+    """Codes of the n-disk solution from those of n-1 disks."""
+    first = _relabel_codes(codes, n - 1, "BC")
+    second = _relabel_codes(codes, n - 1, "AB")
+    top = 2 << (2 * n - 2)  # disk n on C
+    if np is not None:
+        out = np.concatenate((first, second | np.uint64(top)))
+        return array('Q', out.tobytes())
+    first.extend(c | top for c in second)
+    return first
+
+
+def _shrink_codes(codes, n: int):
+    """Codes of the n-1 disk solution: the first half of n's, B and C swapped back."""
+    half = codes[:1 << (n - 1)]
+    out = _relabel_codes(half, n - 1, "BC")
+    return array('Q', out.tobytes()) if np is not None else out
+
+
+class SolutionCache:
+    """Process-wide LRU cache of solved automata keyed by (n, pegs).
+
+    Evicts the least recently used entries beyond `max_entries` or once the
+    stored codes exceed `max_bytes`. A missing 3-peg solution is derived
+    from a cached n-1 (two relabelled copies around one move) or n+1
+    (relabelled first half) when available, instead of being rebuilt.
+    `hits`, `misses` and `derived` count lookups.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 256 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.derived = 0
+
+    @staticmethod
+    def _nbytes(automata):
+        codes = automata.codes
+        if codes is None:
+            return 0
+        return len(codes) * getattr(codes, "itemsize", 8)
+
+    def get(self, n_disks: int, pegs: int = 3, progress=None):
+        """The automaton for `n_disks` and `pegs`, cached.
+
+        `progress` is passed to the constructor when it has to build.
+        """
+        key = (n_disks, pegs)
+        with self._lock:
+            automata = self._entries.get(key)
+            if automata is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return automata
+            self.misses += 1
+            automata = self._derive(n_disks, pegs)
+        if automata is None:
+            automata = AutomataHanoiMatricial(n_disks, pegs=pegs, progress=progress)
+        with self._lock:
+            self._entries[key] = automata
+            self._evict()
+        return automata
+
+    def _derive(self, n, pegs):
+        # reuse a neighbouring stored 3-peg solution when one is cached
+        if pegs != 3 or n > AutomataHanoiMatricial.LAZY_THRESHOLD:
+            return None
+        smaller = self._entries.get((n - 1, 3))
+        if smaller is not None and smaller.codes is not None:
+            codes = _extend_codes(smaller.codes, n)
+        else:
+            larger = self._entries.get((n + 1, 3))
+            if larger is None or larger.codes is None:
+                return None
+            codes = _shrink_codes(larger.codes, n + 1)
+        self.derived += 1
+        return AutomataHanoiMatricial._from_codes(n, codes)
+
+    def _evict(self):
+        total = sum(self._nbytes(a) for a in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            _, automata = self._entries.popitem(last=False)
+            total -= self._nbytes(automata)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.derived = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "derived": self.derived,
+                    "entries": len(self._entries),
+                    "bytes": sum(self._nbytes(a) for a in self._entries.values())}
+
+
+SOLUTION_CACHE = SolutionCache()
+
+
+# legal (src, dst) pairs in MOVE_CODES order: src*3 + dst = 1, 2, 3, 5, 6, 7
+_MOVE_PAIRS = tuple(divmod(code, 3) for code in range(9) if code % 4)
+
+
+class HanoiStateSpace:
+    """The complete automaton over all 3^n configurations of n disks.
+
+    State ids are base-3 numbers whose digit d-1 is the peg of disk d, so
+    id 0 has every disk on A and id 3^n - 1 (the goal) every disk on C.
+    Transitions are stored as CSR arrays: the moves out of state i are
+    `targets[offsets[i]:offsets[i+1]]`, labelled by `labels` (src*3 + dst
+    codes, see MOVE_CODES) in increasing order. Built with NumPy when
+    available, in pure Python otherwise.
+    """
+
+    # ids (targets) are 32-bit; the CSR arrays take about 1 GB at 16 disks
+    # and three times as much per extra disk
+    MAX_DISKS = 16
+
+    def __init__(self, n_disks: int):
+        if not 1 <= n_disks <= self.MAX_DISKS:
+            raise ValueError(f"n_disks must be between 1 and {self.MAX_DISKS}")
+        self.n = n_disks
+        self.size = 3 ** n_disks
+        self.start = 0
+        self.goal = self.size - 1
+        if np is not None:
+            self.offsets, self.targets, self.labels = self._np_build()
+        else:
+            self.offsets, self.targets, self.labels = self._build()
+        self._distances = None
+
+    def _build(self):
+        n = self.n
+        pow3 = [3 ** d for d in range(n)]
+        offsets = array('Q', [0])
+        targets = array(_TYPECODES[4])
+        labels = array('B')
+        digits = [0] * n  # peg of each disk, advanced like an odometer
+        empty = n + 1
+        for i in range(self.size):
+            tops = [empty, empty, empty]
+            for d in range(n, 0, -1):
+                tops[digits[d - 1]] = d
+            for src, dst in _MOVE_PAIRS:
+                disk = tops[src]
+                if disk < tops[dst]:
+                    targets.append(i + (dst - src) * pow3[disk - 1])
+                    labels.append(src * 3 + dst)
+            offsets.append(len(targets))
+            d = 0
+            while d < n and digits[d] == 2:
+                digits[d] = 0
+                d += 1
+            if d < n:
+                digits[d] += 1
+        return offsets, targets, labels
+
+    def _np_build(self, block: int = 1 << 18):
+        # `block` states at a time, so the dense per-move scratch arrays stay
+        # small next to the CSR arrays themselves
+        n, size = self.n, self.size
+        pow3 = 3 ** np.arange(n + 1, dtype=np.int64)
+        codes = np.array([src * 3 + dst for src, dst in _MOVE_PAIRS], dtype=np.uint8)
+        # every state has three moves except the three with all disks on one peg
+        edges = 3 * size - 3
+        offsets = np.zeros(size + 1, dtype=np.uint64)
+        targets = np.empty(edges, dtype=np.uint32)
+        labels = np.empty(edges, dtype=np.uint8)
+        pos = 0
+        for lo in range(0, size, block):
+            hi = min(size, lo + block)
+            ids = np.arange(lo, hi, dtype=np.int64)
+            # top disk of every peg in every state (n + 1 = empty)
+            tops = np.full((3, hi - lo), n + 1, dtype=np.uint8)
+            rest = ids.copy()
+            for d in range(1, n + 1):
+                peg = rest % 3
+                rest //= 3
+                for p in range(3):
+                    free = (peg == p) & (tops[p] > n)
+                    tops[p][free] = d
+            legal = np.empty((hi - lo, len(_MOVE_PAIRS)), dtype=bool)
+            moved = np.empty((hi - lo, len(_MOVE_PAIRS)), dtype=np.uint32)
+            for j, (src, dst) in enumerate(_MOVE_PAIRS):
+                legal[:, j] = tops[src] < tops[dst]
+                disk = np.minimum(tops[src], n).astype(np.intp)
+                moved[:, j] = ids + (dst - src) * pow3[disk - 1]
+            np.cumsum(legal.sum(axis=1), out=offsets[lo + 1:hi + 1])
+            offsets[lo + 1:hi + 1] += np.uint64(pos)
+            count = int(offsets[hi]) - pos
+            targets[pos:pos + count] = moved[legal]
+            labels[pos:pos + count] = codes[np.nonzero(legal)[1]]
+            pos += count
+        return offsets, targets, labels
+
+    def id_of(self, state) -> int:
+        """Id of a state given as three pegs of disks (bottom..top)."""
+        code = _pack_legal(state, self.n)
+        if code is None:
+            raise ValueError(f"{state!r} is not a configuration of {self.n} disks")
+        i = 0
+        for d in range(self.n, 0, -1):
+            i = i * 3 + ((code >> (2 * d - 2)) & 3)
+        return i
+
+    def state_of(self, i: int):
+        """The state with id `i`, as a tuple of three tuples (bottom..top)."""
+        pegs = ([], [], [])
+        digits = []
+        for _ in range(self.n):
+            i, peg = divmod(i, 3)
+            digits.append(peg)
+        for d in range(self.n, 0, -1):
+            pegs[digits[d - 1]].append(d)
+        return (tuple(pegs[0]), tuple(pegs[1]), tuple(pegs[2]))
+
+    def neighbors(self, i: int):
+        """(target id, move label) for every legal move from state `i`."""
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return [(int(self.targets[j]), MOVE_LABELS[self.labels[j] // 3][self.labels[j] % 3]) for j in range(lo, hi)]
+
+    @property
+    def distances(self):
+        """Minimum number of moves from every state to the goal (BFS, computed once)."""
+        if self._distances is None:
+            self._distances = self._np_bfs() if np is not None else self._bfs()
+        return self._distances
+
+    def _bfs(self):
+        offsets, targets = self.offsets, self.targets
+        dist = array('i', [-1]) * self.size
+        dist[self.goal] = 0
+        frontier = deque([self.goal])
+        # moves are reversible, so distances from the goal are distances to it
+        while frontier:
+            i = frontier.popleft()
+            level = dist[i] + 1
+            for j in range(offsets[i], offsets[i + 1]):
+                t = targets[j]
+                if dist[t] < 0:
+                    dist[t] = level
+                    frontier.append(t)
+        return dist
+
+    def _np_bfs(self):
+        offsets = self.offsets.astype(np.int64)
+        dist = np.full(self.size, -1, dtype=np.int32)
+        dist[self.goal] = 0
+        frontier = np.array([self.goal], dtype=np.int64)
+        level = 0
+        while frontier.size:
+            level += 1
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            # edge indices of the whole frontier, concatenated
+            first = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            nbrs = self.targets[first + np.arange(counts.sum())]
+            nbrs = np.unique(nbrs[dist[nbrs] < 0])
+            dist[nbrs] = level
+            frontier = nbrs.astype(np.int64)
+        return dist
+
+    # Sierpinski layout: disk d on peg A/B/C contributes 2^(d-1) times the
+    # A (top), B (bottom left) or C (bottom right) corner of a triangle, so
+    # moving the smallest disk is always a unit step and the graph draws as
+    # a Sierpinski gasket. Split into low/high digit tables for speed.
+    _CORNERS = ((0.5, 0.0), (0.0, math.sqrt(3) / 2), (1.0, math.sqrt(3) / 2))
+
+    def _layout_tables(self, digits: int, first_disk: int, spacing: float):
+        xs, ys = [0.0], [0.0]
+        for d in range(first_disk, first_disk + digits):
+            w = spacing * (1 << (d - 1))
+            xs = [x + cx * w for cx, _ in self._CORNERS for x in xs]
+            ys = [y + cy * w for _, cy in self._CORNERS for y in ys]
+        return xs, ys
+
+    def position(self, i: int, spacing: float = 60.0):
+        """(x, y) of state `i` in the Sierpinski layout."""
+        x = y = 0.0
+        for d in range(1, self.n + 1):
+            i, peg = divmod(i, 3)
+            cx, cy = self._CORNERS[peg]
+            x += cx * spacing * (1 << (d - 1))
+            y += cy * spacing * (1 << (d - 1))
+        return x, y
+
+    def export_jflap(self, path: str, compress=None, chunk: int = 65536, spacing: float = 60.0):
+        """Export the complete automaton as a JFLAP .jff file.
+
+        States are placed with the Sierpinski layout (`spacing` pixels per
+        unit step); the initial state has every disk on A and the final one
+        every disk on C. The XML is written `chunk` states at a time, so
+        memory stays bounded besides the CSR arrays. Compressed like
+        `AutomataHanoiMatricial.export_jflap`. Returns the number of states.
+        """
+        with _open_output(path, compress) as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write("<structure><type>fa</type><automaton>")
+            for piece in self._iter_jflap_blocks(spacing, chunk):
+                f.write(piece)
+            f.write("</automaton></structure>\n")
+        return self.size
+
+    def _iter_jflap_blocks(self, spacing, block):
+        margin = 50
+        low = min(self.n, 7)
+        xlo, ylo = self._layout_tables(low, 1, spacing)
+        xhi, yhi = self._layout_tables(self.n - low, low + 1, spacing)
+        xlo = [round(margin + x) for x in xlo]
+        ylo = [round(margin + y) for y in ylo]
+        xhi = [round(x) for x in xhi]
+        yhi = [round(y) for y in yhi]
+        base = 3 ** low
+        extras = {self.start: "<initial />"}
+        extras[self.goal] = extras.get(self.goal, "") + "<final />"
+        for first in range(0, self.size, block):
+            yield "".join([f"<state id=\"{i}\" name=\"S{i}\"><x>{xlo[i % base] + xhi[i // base]}</x>"
+                           f"<y>{ylo[i % base] + yhi[i // base]}</y>{extras.get(i, '')}</state>"
+                           for i in range(first, min(first + block, self.size))])
+
+        # transitions: the CSR arrays are converted to Python ints one
+        # block of states at a time
+        tails = [f"</to><read>{html.escape(MOVE_LABELS[code // 3][code % 3])}</read></transition>"
+                 for code in range(9)]
+        for first in range(0, self.size, block):
+            last = min(first + block, self.size)
+            offsets = [int(o) for o in self.offsets[first:last + 1]]
+            targets = self.targets[offsets[0]:offsets[-1]].tolist()
+            labels = self.labels[offsets[0]:offsets[-1]].tolist()
+            sources = [i for i in range(first, last) for _ in range(offsets[i - first + 1] - offsets[i - first])]
+            yield "".join([f"<transition><from>{i}</from><to>{t}{tails[code]}"
+                           for i, t, code in zip(sources, targets, labels)])
+
+
+# Verdict of `grade_batch` for one sequence. `optimal` means solved in
+# exactly 2^n - 1 moves; `deviation` is the move count minus that optimum,
+# None when the sequence does not solve the tower.
+Grade = namedtuple("Grade", "legal solved optimal moves deviation first_illegal")
+
+
+def _grade_chunk(args):
+    # worker side of grade_batch: validate one chunk of sequences
+    n, chunk = args
+    automata = AutomataHanoiMatricial(n, lazy=True)
+    optimum = (1 << n) - 1
+    grades = []
+    for moves in chunk:
+        if isinstance(moves, str):
+            moves = moves.replace(",", " ").split()
+        r = automata.validate_moves(moves)
+        grades.append(Grade(r.ok, r.solved, r.solved and r.count == optimum,
+                            r.count, r.count - optimum if r.solved else None, r.first_illegal))
+    return grades
+
+
+def grade_batch(n_disks: int, sequences, workers=None, chunk_size: int = 256):
+    """Grade many move sequences for `n_disks`, yielding a `Grade` each, in order.
+
+    Each sequence is anything `validate_moves` accepts, or one string of
+    labels separated by commas/whitespace. Sequences are sharded in chunks
+    of `chunk_size` across a process pool of `workers` processes (default:
+    one per CPU, `workers=1` grades in-process); only a few chunks per
+    worker are in flight, so `sequences` may be an unbounded stream.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    it = iter(sequences)
+    chunks = iter(lambda: list(itertools.islice(it, chunk_size)), [])
+    if workers == 1:
+        for chunk in chunks:
+            yield from _grade_chunk((n_disks, chunk))
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_grade_chunk, (n_disks, chunk)))
+            if len(pending) >= 4 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def grade_file(n_disks: int, path: str, **kwargs):
+    """`grade_batch` over a text file with one sequence of labels per line."""
+    with open(path, encoding="utf-8") as f:
+        yield from grade_batch(n_disks, (line.rstrip("\n") for line in f), **kwargs)
+
+
+def _export_run(automata, fmt: str, path=None):
+    # run() exports `automata` as 'csv' or 'jflap' to `path` (default: the
+    # null device) and returns the number of states written
+    export = {"csv": automata.export_csv, "jflap": automata.export_jflap}[fmt]
+
+    def run():
+        export(path or os.devnull)
+        return len(automata.states)
+    return run
+
+
+def benchmark_export(n_disks: int, fmt: str = "jflap", path=None, lazy=None):
+    """Time one export of the n-disk solution and report its throughput.
+
+    `fmt` is 'csv' or 'jflap'; the output goes to `path` (default: the null
+    device). Returns a dict with states, seconds and states_per_sec.
+    """
+    run = _export_run(AutomataHanoiMatricial(n_disks, lazy=lazy), fmt, path)
+    t0 = time.perf_counter()
+    states = run()
+    seconds = time.perf_counter() - t0
+    return {"states": states, "seconds": seconds, "states_per_sec": states / seconds if seconds else float("inf")}
+
+
+# --- benchmark suite ---
+# Each case maps n to a (run, teardown) pair: run() performs the work once
+# and returns how many items (states, moves, frames) it processed. Setup
+# cost (building the automaton, encoding moves) is not timed. A case
+# returns None for sizes it cannot handle.
+
+def _bench_build(n):
+    if n > AutomataHanoiMatricial.MAX_PACKED_DISKS:
+        return None
+    return (lambda: len(AutomataHanoiMatricial(n, lazy=False).states)), None
+
+
+def _bench_export(fmt):
+    # same timed path as benchmark_export
+    def setup(n):
+        return _export_run(AutomataHanoiMatricial(n), fmt), None
+    return setup
+
+
+def _bench_simulate(n):
+    automata = AutomataHanoiMatricial(n)
+    moves = list(automata.sequence)
+
+    def run():
+        automata.simulate_manual(moves)
+        return len(moves)
+    return run, None
+
+
+def _bench_validate(n):
+    automata = AutomataHanoiMatricial(n)
+    moves = encode_moves(automata.sequence)
+
+    def run():
+        automata.validate_moves(moves)
+        return len(moves)
+    return run, None
+
+
+def _bench_render(n, frames=2000):
+    # draw_state on an offscreen (withdrawn) Tk window; None without
+    # tkinter or a display
+    try:
+        _load_tk()
+    except ImportError:
+        return None
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    app = HanoiGUI(root)
+    app.automata = AutomataHanoiMatricial(n)
+    app._update_geometry()
+    app._draw_pegs()
+    states = app.automata.states
+    count = min(len(states), frames)
+
+    def run():
+        for i in range(count):
+            app.draw_state(states[i])
+        root.update_idletasks()
+        return count
+    return run, root.destroy
+
+
+def _bench_frame_stewart(n, pegs=(4, 5, 6)):
+    # cost/split tables from scratch, for n disks and each peg count
+    def run():
+        FrameStewart.clear()
+        for k in pegs:
+            FrameStewart.moves(n, k)
+        return n * len(pegs)
+    return run, None
+
+
+def _bench_state_space(n):
+    # CSR graph of all 3^n states plus BFS distances
+    def run():
+        space = HanoiStateSpace(n)
+        space.distances
+        return space.size
+    return run, None
+
+
+# name -> (largest n worth running, setup)
+BENCH_CASES = {
+    "build": (25, _bench_build),
+    "export_csv": (25, _bench_export("csv")),
+    "export_jflap": (25, _bench_export("jflap")),
+    "simulate_manual": (18, _bench_simulate),
+    "validate_moves": (25, _bench_validate),
+    "draw_state": (30, _bench_render),
+    "frame_stewart": (1000, _bench_frame_stewart),
+    "state_space": (14, _bench_state_space),
+}
+
+
+def run_benchmarks(ns, cases=None, repeat: int = 1, memory: bool = True, report=None):
+    """Run the benchmark `cases` (default: all of BENCH_CASES) for each n in `ns`.
+
+    Each result is a dict with case, n, seconds (best of `repeat`), items,
+    items_per_sec and peak_bytes (tracemalloc peak of a separate run, so
+    tracing does not skew the timing; None with `memory=False`).
+    `report(result)` is called as results come in.
+    """
+    results = []
+    for name in cases or BENCH_CASES:
+        max_n, setup = BENCH_CASES[name]
+        for n in ns:
+            if n > max_n:
+                continue
+            prepared = setup(n)
+            if prepared is None:
+                continue
+            run, teardown = prepared
+            try:
+                best = None
+                for _ in range(max(1, repeat)):
+                    t0 = time.perf_counter()
+                    items = run()
+                    elapsed = time.perf_counter() - t0
+                    best = elapsed if best is None else min(best, elapsed)
+                peak = None
+                if memory:
+                    tracemalloc.start()
+                    try:
+                        run()
+                        peak = tracemalloc.get_traced_memory()[1]
+                    finally:
+                        tracemalloc.stop()
+            finally:
+                if teardown:
+                    teardown()
+            result = {"case": name, "n": n, "seconds": best, "items": items,
+                      "items_per_sec": items / best if best else float("inf"), "peak_bytes": peak}
+            results.append(result)
+            if report:
+                report(result)
+    return results
+
+
+def save_benchmarks(results, path: str):
+    """Save benchmark results as a JSON baseline."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "results": results}, f, indent=1)
+
+
+def compare_benchmarks(results, baseline_path: str, threshold: float = 0.2, floor: float = 1e-3):
+    """Cases slower than the saved baseline by more than `threshold` (0.2 = 20%).
+
+    Cases faster than `floor` seconds in the baseline are timer noise and
+    are ignored. Returns (case, n, baseline_seconds, seconds) tuples.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["n"]): r["seconds"] for r in json.load(f)["results"]}
+    slower = []
+    for r in results:
+        base = baseline.get((r["case"], r["n"]))
+        if base and base >= floor and r["seconds"] > base * (1 + threshold):
+            slower.append((r["case"], r["n"], base, r["seconds"]))
+    return slower
+
+
+class AnimationScheduler:
+    """One frame loop on `root.after` driving every running animation.
+
+    An animation is a callback `frame(t)` called once per display frame with
+    `t` in [0, 1], the fraction of its duration elapsed by
+    `time.perf_counter()`. Positions are therefore computed from wall time:
+    when a frame is late the next one simply jumps ahead (the skipped frames
+    are counted in `dropped_frames`) and playback never accumulates lag.
+    All animations are updated in the same tick, so Tk repaints once per
+    frame.
+    """
+
+    def __init__(self, root, fps: int = 60):
+        self.root = root
+        self.interval = 1.0 / fps
+        self.dropped_frames = 0
+        self._anims = {}
+        self._ids = itertools.count(1)
+        self._job = None
+        self._next_frame = 0.0
+
+    def start(self, duration: float, frame, on_done=None, loop: bool = False) -> int:
+        """Run `frame(t)` for `duration` seconds, then `on_done()`.
+
+        With `loop=True` it restarts every `duration` seconds until
+        cancelled. Returns an id for `cancel`.
+        """
+        anim_id = next(self._ids)
+        self._anims[anim_id] = (time.perf_counter(), max(duration, 1e-6), frame, on_done, loop)
+        frame(0.0)
+        if self._job is None:
+            self._next_frame = time.perf_counter() + self.interval
+            self._job = self.root.after(int(self.interval * 1000), self._tick)
+        return anim_id
+
+    def cancel(self, anim_id):
+        """Stop an animation without calling its `on_done`."""
+        self._anims.pop(anim_id, None)
+
+    def _tick(self):
+        self._job = None
+        now = time.perf_counter()
+        late = now - self._next_frame
+        if late > self.interval:
+            self.dropped_frames += int(late / self.interval)
+        finished = []
+        for anim_id, (t0, duration, frame, on_done, loop) in list(self._anims.items()):
+            if anim_id not in self._anims:
+                continue  # cancelled by another animation this frame
+            t = (now - t0) / duration
+            if loop:
+                frame(t % 1.0)
+            elif t >= 1.0:
+                frame(1.0)
+                finished.append(anim_id)
+            else:
+                frame(t)
+        for anim_id in finished:
+            anim = self._anims.pop(anim_id, None)
+            if anim and anim[3]:
+                anim[3]()
+        if self._anims and self._job is None:
+            # aim at the next frame boundary, not `interval` after this tick
+            self._next_frame = max(self._next_frame + self.interval, now)
+            delay = max(1, int((self._next_frame - time.perf_counter()) * 1000))
+            self._job = self.root.after(delay, self._tick)
+
+
+class Profiler:
+    """Opt-in instrumentation for the GUI event loop.
+
+    Nothing is measured unless `attach` is called: it replaces the selected
+    methods of an object with timing wrappers (instance attributes, so the
+    class and other instances are untouched) and records a latency
+    histogram per method. `attach_scheduler` additionally records how late
+    each `after()` tick fires (jitter) and reads the scheduler's dropped
+    frame count. With profiling off there is no wrapper and no overhead.
+    """
+
+    # upper bounds of the latency histogram buckets, in milliseconds
+    BUCKETS_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, float("inf"))
+
+    def __init__(self):
+        self.stats = {}
+        self.schedulers = []
+        self.canvas_items = 0
+        self.max_canvas_items = 0
+
+    def record(self, name: str, seconds: float):
+        st = self.stats.get(name)
+        if st is None:
+            st = self.stats[name] = {"count": 0, "total": 0.0, "max": 0.0, "hist": [0] * len(self.BUCKETS_MS)}
+        st["count"] += 1
+        st["total"] += seconds
+        st["max"] = max(st["max"], seconds)
+        ms = seconds * 1000
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                st["hist"][i] += 1
+                break
+
+    def _wrap(self, fn, name):
+        perf = time.perf_counter
+        record = self.record
+
+        def timed(*args, **kwargs):
+            t0 = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, perf() - t0)
+        return timed
+
+    def attach(self, obj, names, prefix=""):
+        """Time every call of the methods `names` of `obj`."""
+        for name in names:
+            fn = getattr(obj, name, None)
+            if fn is not None:
+                setattr(obj, name, self._wrap(fn, prefix + name))
+
+    def attach_scheduler(self, scheduler, canvas=None):
+        """Time scheduler ticks and record how late each one fires.
+
+        With `canvas`, its item count is sampled after every tick.
+        """
+        tick = scheduler._tick
+        timed = self._wrap(tick, "scheduler._tick")
+        perf = time.perf_counter
+        record = self.record
+
+        def tick_with_jitter():
+            record("after_jitter", max(0.0, perf() - scheduler._next_frame))
+            timed()
+            if canvas is not None:
+                self.sample_canvas(canvas)
+        scheduler._tick = tick_with_jitter
+        self.schedulers.append(scheduler)
+
+    def sample_canvas(self, canvas):
+        self.canvas_items = len(canvas.find_all())
+        self.max_canvas_items = max(self.max_canvas_items, self.canvas_items)
+
+    def snapshot(self) -> dict:
+        """All counters as a JSON-serializable dict (times in milliseconds)."""
+        callbacks = {}
+        for name, st in sorted(self.stats.items()):
+            callbacks[name] = {
+                "count": st["count"],
+                "mean_ms": st["total"] * 1000 / st["count"],
+                "max_ms": st["max"] * 1000,
+                "hist": {(f">{self.BUCKETS_MS[-2]}ms" if b == float("inf") else f"<={b}ms"): c
+                         for b, c in zip(self.BUCKETS_MS, st["hist"])},
+            }
+        return {
+            "callbacks": callbacks,
+            "dropped_frames": sum(s.dropped_frames for s in self.schedulers),
+            "canvas_items": self.canvas_items,
+            "max_canvas_items": self.max_canvas_items,
+        }
+
+    def summary_lines(self):
+        snap = self.snapshot()
+        lines = [f"frames perdidos: {snap['dropped_frames']}  items canvas: {snap['canvas_items']}"]
+        for name, st in snap["callbacks"].items():
+            lines.append(f"{name}: n={st['count']} media={st['mean_ms']:.2f}ms max={st['max_ms']:.1f}ms")
+        return lines
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=1)
+
+
+class JobRunner:
+    """Runs one long job (build, export) at a time on a worker thread.
+
+    `start(work, ...)` calls `work(progress)` off the Tk thread; the job
+    reports through `progress(done, total)`, which also raises
+    `JobCancelled` once `cancel()` was requested. Progress and the outcome
+    travel back through a queue polled with `root.after`, so every
+    callback runs on the Tk thread and the window keeps repainting.
+    """
+
+    POLL_MS = 50
+    # minimum seconds between progress messages from the worker
+    REPORT_EVERY = 0.05
 
-class HanoiGUI:
     def __init__(self, root):
+        self.root = root
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._callbacks = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None
+
+    def start(self, work, on_progress=None, on_done=None, on_error=None, on_cancel=None):
+        """Run `work(progress)` in the background; False if a job is already running."""
+        if self.busy:
+            return False
+        self._cancel.clear()
+        self._callbacks = (on_progress, on_done, on_error, on_cancel)
+        self._thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+        return True
+
+    def cancel(self):
+        """Ask the running job to stop at its next progress report."""
+        self._cancel.set()
+
+    def _run(self, work):
+        # worker thread: never touches Tk
+        t0 = time.perf_counter()
+        last = [0.0]
+
+        def progress(done, total):
+            if self._cancel.is_set():
+                raise JobCancelled()
+            now = time.perf_counter()
+            if now - last[0] >= self.REPORT_EVERY or done == total:
+                last[0] = now
+                self._queue.put(("progress", done, total, now - t0))
+
+        try:
+            result = work(progress)
+        except JobCancelled:
+            self._queue.put(("cancelled",))
+        except Exception as e:
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", result))
+
+    def _poll(self):
+        on_progress, on_done, on_error, on_cancel = self._callbacks
+        while True:
+            try:
+                msg = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = msg[0]
+            if kind == "progress":
+                if on_progress:
+                    on_progress(*msg[1:])
+                continue
+            # the job is over
+            self._thread = None
+            if kind == "done" and on_done:
+                on_done(msg[1])
+            elif kind == "error" and on_error:
+                on_error(msg[1])
+            elif kind == "cancelled" and on_cancel:
+                on_cancel()
+            return
+        self.root.after(self.POLL_MS, self._poll)
+
+
+def _load_tk():
+    """Import tkinter into the module globals on first use."""
+    global tk, ttk, filedialog, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as _ttk, filedialog as _filedialog, messagebox as _messagebox
+        tk, ttk, filedialog, messagebox = tkinter, _ttk, _filedialog, _messagebox
+    return tk
+
+
+class SequenceLog:
+    """Right-panel log: a bounded event log above a virtual move list.
+
+    Event messages go to a ring buffer of `MAX_EVENTS` lines; the oldest
+    line is dropped from the widget as a new one arrives. The move list
+    shows `data` (any Sequence of labels, e.g. `automata.sequence`) but
+    only the rows in view are ever written to its Text widget, so its cost
+    does not depend on the number of moves. The current step is marked by
+    moving a tag; the rows are rewritten only when it scrolls out of view.
+    """
+
+    MAX_EVENTS = 200
+
+    def __init__(self, parent, width: int = 30, rows: int = 8):
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self.text_events = tk.Text(parent, width=width, height=5, wrap="word")
+        self.text_events.pack(padx=6, pady=(4, 0))
+        frame = ttk.Frame(parent)
+        frame.pack(padx=6, pady=4, fill="x")
+        self.rows = rows
+        self.text_rows = tk.Text(frame, width=width - 2, height=rows, wrap="none", cursor="arrow")
+        self.text_rows.pack(side="left")
+        self.scroll = ttk.Scrollbar(frame, orient="vertical", command=self._on_scroll)
+        self.scroll.pack(side="right", fill="y")
+        self.text_rows.tag_configure("current", background="#264653", foreground="#ffffff")
+        self.text_rows.config(state="disabled")
+        for ev in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text_rows.bind(ev, self._on_wheel)
+        self.data = ()
+        self.first = 0
+        self.current = None
+
+    # --- event log ---
+    def log(self, message: str):
+        """Append one event message (newlines are folded)."""
+        line = " ".join(message.split())
+        if not line:
+            return
+        if len(self.events) == self.events.maxlen:
+            self.text_events.delete("1.0", "2.0")
+        self.events.append(line)
+        self.text_events.insert(tk.END, line + "\n")
+        self.text_events.see(tk.END)
+
+    def log_many(self, messages):
+        """Append many messages, rewriting the widget once."""
+        # drop blank messages first: log() trims the widget by deque length
+        lines = (" ".join(m.split()) for m in messages)
+        self.events.extend(line for line in lines if line)
+        self.text_events.delete("1.0", tk.END)
+        self.text_events.insert(tk.END, "".join(line + "\n" for line in self.events))
+        self.text_events.see(tk.END)
+
+    def clear_events(self):
+        self.events.clear()
+        self.text_events.delete("1.0", tk.END)
+
+    # --- virtual move list ---
+    def set_data(self, data):
+        self.data = data
+        self.first = 0
+        self.current = None
+        self._render()
+
+    def set_current(self, index):
+        """Highlight row `index` (None for none), scrolling it into view."""
+        self.current = index if index is not None and 0 <= index < len(self.data) else None
+        if self.current is not None and not self.first <= self.current < self.first + self.rows:
+            self.first = max(0, self.current - self.rows // 2)
+            self._render()
+        else:
+            self._mark_current()
+
+    def _render(self):
+        total = len(self.data)
+        self.first = max(0, min(self.first, total - self.rows))
+        rows = self.data[self.first:self.first + self.rows]
+        width = len(str(total))
+        text = "\n".join(f"{i:>{width}}. {label}" for i, label in enumerate(rows, self.first + 1))
+        self.text_rows.config(state="normal")
+        self.text_rows.delete("1.0", tk.END)
+        self.text_rows.insert("1.0", text)
+        self.text_rows.config(state="disabled")
+        self._mark_current()
+        if total:
+            self.scroll.set(self.first / total, min(1.0, (self.first + self.rows) / total))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    def _mark_current(self):
+        self.text_rows.tag_remove("current", "1.0", tk.END)
+        if self.current is not None and self.first <= self.current < self.first + self.rows:
+            line = self.current - self.first + 1
+            self.text_rows.tag_add("current", f"{line}.0", f"{line}.end")
+
+    def _scroll_to(self, first):
+        first = max(0, min(int(first), len(self.data) - self.rows))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def _on_scroll(self, *args):
+        # scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.data))
+        elif args[0] == "scroll":
+            step = self.rows if args[2] == "pages" else 1
+            self._scroll_to(self.first + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.first - 3)
+        else:
+            self._scroll_to(self.first + 3)
+        return "break"
+
+
+class LinearDiagram:
+    """A row of up to `slots` state nodes whose canvas items are created once.
+
+    `show` maps a window of consecutive indices onto the persistent items
+    and reconfigures only the items whose label, colour or visibility
+    changed, so moving the highlight costs O(1) item updates and sliding
+    the window at most O(slots). `style` holds the colours and fonts:
+    fill/outline/text for normal and current nodes, `arrow`,
+    `arrow_current` (None: no highlight), `font`, `edge_font`, `edge_fill`.
+    """
+
+    def __init__(self, canvas, slots, y, r, pad, width, style):
+        self.canvas = canvas
+        self.slots = slots
+        self.y = y
+        self.r = r
+        self.pad = pad
+        self.width = width
+        self.style = style
+        self.count = None
+        self.spacing = 0
+        self._node_cache = [None] * slots
+        self._edge_cache = [None] * slots
+        st = style
+        self._ovals = [canvas.create_oval(0, 0, 0, 0, width=2, state="hidden") for _ in range(slots)]
+        self._texts = [canvas.create_text(0, 0, font=st.get("font"), state="hidden") for _ in range(slots)]
+        self._lines = [canvas.create_line(0, 0, 0, 0, arrow=tk.LAST, width=2, state="hidden") for _ in range(slots - 1)]
+        self._edge_texts = [canvas.create_text(0, 0, font=st.get("edge_font"), fill=st.get("edge_fill", "#333"), state="hidden")
+                            for _ in range(slots - 1)]
+
+    def x_of(self, slot):
+        return int(self.pad + slot * self.spacing)
+
+    def _layout(self, count):
+        self.count = count
+        self.spacing = (self.width - 2*self.pad) / max(1, count-1)
+        y, r = self.y, self.r
+        for slot in range(self.slots):
+            x = self.x_of(slot)
+            self.canvas.coords(self._ovals[slot], x-r, y-r, x+r, y+r)
+            self.canvas.coords(self._texts[slot], x, y)
+            if slot < self.slots - 1:
+                x2 = self.x_of(slot + 1)
+                self.canvas.coords(self._lines[slot], x+r, y, x2-r, y)
+                self.canvas.coords(self._edge_texts[slot], (x + x2)//2, y-12)
+
+    def show(self, start, count, current, label, edge_label=None):
+        """Show indices start..start+count-1 with `current` highlighted.
+
+        `label(idx)` gives a node's text, `edge_label(idx)` the text of the
+        arrow idx -> idx+1 (omitted when None).
+        """
+        count = min(count, self.slots)
+        if count != self.count:
+            self._layout(count)
+        st = self.style
+        canvas = self.canvas
+        for slot in range(self.slots):
+            idx = start + slot
+            want = (label(idx), idx == current) if slot < count else None
+            if want != self._node_cache[slot]:
+                if want is None:
+                    canvas.itemconfig(self._ovals[slot], state="hidden")
+                    canvas.itemconfig(self._texts[slot], state="hidden")
+                else:
+                    cur = want[1]
+                    canvas.itemconfig(self._ovals[slot], state="normal",
+                                      fill=st["current_fill"] if cur else st["fill"],
+                                      outline=st["current_outline"] if cur else st["outline"])
+                    canvas.itemconfig(self._texts[slot], state="normal", text=want[0],
+                                      fill=st["current_text"] if cur else st["text"])
+                self._node_cache[slot] = want
+            if slot == self.slots - 1:
+                continue
+            if slot < count - 1:
+                hot = st.get("arrow_current") is not None and idx == current
+                want = (hot, edge_label(idx) if edge_label else None)
+            else:
+                want = None
+            if want != self._edge_cache[slot]:
+                if want is None:
+                    canvas.itemconfig(self._lines[slot], state="hidden")
+                    canvas.itemconfig(self._edge_texts[slot], state="hidden")
+                else:
+                    canvas.itemconfig(self._lines[slot], state="normal",
+                                      fill=st["arrow_current"] if want[0] else st["arrow"])
+                    if want[1] is None:
+                        canvas.itemconfig(self._edge_texts[slot], state="hidden")
+                    else:
+                        canvas.itemconfig(self._edge_texts[slot], state="normal", text=want[1])
+                self._edge_cache[slot] = want
+
+
+class ChainEdges(Sequence):
+    """Edges (i, i+1, label) of a linear automaton, built from its labels on access."""
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = _norm_index(i, len(self))
+        return (i, i + 1, self.labels[i])
+
+
+class CompactDiagram:
+    """Zoomable horizontal diagram of a linear path of `count` nodes.
+
+    Only the visible range [start, start+span) is drawn. When it holds more
+    nodes than fit the canvas width, consecutive nodes are merged into
+    bucket nodes labelled with their index range, so the item count stays
+    bounded for any n. A minimap shows the visible range; the mouse wheel
+    zooms around the cursor and dragging pans.
+    """
+
+    PAD = 16
+    R = 14
+
+    def __init__(self, canvas, count, edges, highlight_idx=None, title=None):
+        self.canvas = canvas
+        self.count = max(1, count)
+        self.edges = edges
+        self.highlight_idx = highlight_idx
+        self.title = title
+        self.start = 0
+        self.span = self.count
+        self._drag_x = None
+        canvas.bind("<MouseWheel>", lambda e: self.zoom(e.x, e.delta > 0))
+        canvas.bind("<Button-4>", lambda e: self.zoom(e.x, True))
+        canvas.bind("<Button-5>", lambda e: self.zoom(e.x, False))
+        canvas.bind("<ButtonPress-1>", self._on_press)
+        canvas.bind("<B1-Motion>", self._on_drag)
+
+    def _size(self):
+        return int(self.canvas.winfo_width() or 360), int(self.canvas.winfo_height() or 200)
+
+    def budget(self):
+        # how many full-size nodes fit side by side
+        w, _ = self._size()
+        return max(2, int((w - 2*self.PAD) // (2*self.R + 6)) + 1)
+
+    def _clamp(self):
+        self.span = max(1, min(self.count, int(self.span)))
+        self.start = max(0, min(self.count - self.span, int(self.start)))
+
+    def zoom(self, x, zoom_in):
+        w, _ = self._size()
+        frac = min(1.0, max(0.0, (x - self.PAD) / max(1, w - 2*self.PAD)))
+        anchor = self.start + frac * self.span
+        new_span = self.span // 2 if zoom_in else self.span * 2
+        new_span = max(min(self.count, self.budget()), new_span)
+        self.start = anchor - frac * new_span
+        self.span = new_span
+        self._clamp()
+        self.render()
+
+    def _on_press(self, event):
+        self._drag_x = event.x
+
+    def _on_drag(self, event):
+        if self._drag_x is None:
+            return
+        w, _ = self._size()
+        shift = (self._drag_x - event.x) / max(1, w - 2*self.PAD) * self.span
+        if abs(shift) >= 1:
+            self._drag_x = event.x
+            self.start += shift
+            self._clamp()
+            self.render()
+
+    def render(self):
+        c = self.canvas
+        c.delete("all")
+        w, h = self._size()
+        pad, r = self.PAD, self.R
+        y = h//2
+        # optional title
+        if self.title:
+            c.create_text(w//2, 12, text=self.title, fill="#222", font=("Arial", 10, "bold"))
+        budget = self.budget()
+        bucket = max(1, -(-self.span // budget))  # ceil: nodes per drawn node
+        groups = [(a, min(a + bucket, self.start + self.span) - 1)
+                  for a in range(self.start, self.start + self.span, bucket)]
+        spacing = (w - 2*pad) / max(1, len(groups)-1)
+        for k, (a, b) in enumerate(groups):
+            x = int(pad + k * spacing)
+            is_current = self.highlight_idx is not None and a <= self.highlight_idx <= b
+            fill = "#2a9d8f" if is_current else "#fff"
+            outline = "#0b3d2e" if is_current else "#666"
+            text_fill = "#fff" if is_current else "#000"
+            if a == b:
+                c.create_oval(x-r, y-r, x+r, y+r, fill=fill, outline=outline, width=2)
+                c.create_text(x, y, text=f"{a}", fill=text_fill, font=("Arial", 8 if a >= 100 else 10))
+            else:
+                # summary node for a bucket of consecutive states
+                c.create_rectangle(x-r, y-r, x+r, y+r, fill=fill, outline=outline, width=2)
+                c.create_text(x, y, text="…", fill=text_fill)
+                c.create_text(x, y+r+8 + (k % 2) * 10, text=f"{a}–{b}", fill="#555", font=("Arial", 7))
+            if k < len(groups) - 1:
+                x2 = int(pad + (k+1) * spacing)
+                c.create_line(x+r, y, x2-r, y, arrow=tk.LAST, fill="#888", width=2)
+                # label only edges between two single nodes
+                if bucket == 1 and b < len(self.edges):
+                    fx, tx, mv = self.edges[b]
+                    if fx == b and tx == b + 1:
+                        c.create_text((x + x2)//2, y-12, text=mv, fill="#333", font=("Arial", 8))
+        if self.span < self.count or bucket > 1:
+            self._draw_minimap(w, h)
+
+    def _draw_minimap(self, w, h):
+        c = self.canvas
+        pad = self.PAD
+        y = h - 26
+        width = w - 2*pad
+        c.create_rectangle(pad, y, w - pad, y + 6, fill="#eee", outline="#bbb")
+        x0 = pad + width * self.start / self.count
+        x1 = max(x0 + 3, pad + width * (self.start + self.span) / self.count)
+        c.create_rectangle(x0, y - 1, x1, y + 7, fill="#2a9d8f", outline="")
+        if self.highlight_idx is not None:
+            xh = pad + width * self.highlight_idx / self.count
+            c.create_line(xh, y - 3, xh, y + 9, fill="#e76f51", width=2)
+        c.create_text(w//2, h - 10, text=f"{self.start}–{self.start + self.span - 1} de {self.count}  (rueda: zoom, arrastrar: mover)",
+                      fill="#666", font=("Arial", 7))
+
+
+class HanoiGUI:
+    # methods timed by the profiler (hot paths of playback and drawing)
+    PROFILED_METHODS = ("draw_state", "draw_automaton_diagram", "animate_move", "animate_diagram_move",
+                        "_update_info", "_advance_and_draw", "_play_step")
+    PROFILER_REFRESH_MS = 500
+
+    def __init__(self, root, profiler=None):
+        _load_tk()
         self.root = root
         self.root.title("Autómata Torre de Hanoi")
 
@@ -147,13 +2238,19 @@ class HanoiGUI:
         frame_top.pack(fill="x")
 
         ttk.Label(frame_top, text="Número de discos:").pack(side="left")
-        self.spin_disks = ttk.Spinbox(frame_top, from_=1, to=10, width=5)
+        self.spin_disks = ttk.Spinbox(frame_top, from_=1, to=30, width=5)
         self.spin_disks.pack(side="left")
         self.spin_disks.set(3)
+        ttk.Label(frame_top, text="Pilones:").pack(side="left", padx=(8, 0))
+        self.spin_pegs = ttk.Spinbox(frame_top, from_=3, to=MAX_PEGS, width=3)
+        self.spin_pegs.pack(side="left")
+        self.spin_pegs.set(3)
 
         ttk.Button(frame_top, text="Generar autómata", command=self.generar).pack(side="left", padx=10)
         ttk.Button(frame_top, text="Exportar CSV", command=self.export_csv).pack(side="left")
         ttk.Button(frame_top, text="Exportar JFLAP", command=self.export_jflap).pack(side="left")
+        ttk.Button(frame_top, text="Exportar binario", command=self.export_binary).pack(side="left")
+        ttk.Button(frame_top, text="Abrir binario", command=self.open_binary).pack(side="left")
 
         # 
         frame_controls = ttk.Frame(root, padding=8)
@@ -170,10 +2267,38 @@ class HanoiGUI:
         self.btn_manual = ttk.Button(frame_controls, text="Modo Manual", command=self.toggle_manual)
         self.btn_manual.pack(side="left", padx=(12,4))
         ttk.Button(frame_controls, text="Reset Manual", command=self.reset_manual).pack(side="left", padx=4)
+        self.btn_hint = ttk.Button(frame_controls, text="Pista", command=self.show_hint)
+        self.btn_hint.pack(side="left", padx=4)
+        self.btn_solve = ttk.Button(frame_controls, text="Resolver desde aquí", command=self.solve_from_here)
+        self.btn_solve.pack(side="left", padx=4)
         ttk.Label(frame_controls, text="Velocidad:").pack(side="left", padx=(10,2))
         self.speed = tk.DoubleVar(value=1.0)
         ttk.Scale(frame_controls, from_=0.2, to=2.0, variable=self.speed, orient="horizontal", length=150).pack(side="left")
 
+        # turbo playback and direct jump to a step
+        frame_turbo = ttk.Frame(root, padding=(8, 0))
+        frame_turbo.pack(fill="x")
+        self.turbo = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_turbo, text="Turbo", variable=self.turbo).pack(side="left", padx=4)
+        ttk.Label(frame_turbo, text="Pasos/s:").pack(side="left", padx=(6,2))
+        self.spin_rate = ttk.Spinbox(frame_turbo, from_=1, to=50000, increment=100, width=7)
+        self.spin_rate.pack(side="left")
+        self.spin_rate.set(1000)
+        ttk.Label(frame_turbo, text="Ir a paso:").pack(side="left", padx=(12,2))
+        self.entry_goto = ttk.Entry(frame_turbo, width=10)
+        self.entry_goto.pack(side="left")
+        self.btn_goto = ttk.Button(frame_turbo, text="Ir", command=self.goto_step)
+        self.btn_goto.pack(side="left", padx=4)
+
+        # background jobs (generation, exports): progress, ETA and cancel
+        self.jobs = JobRunner(self.root)
+        self.btn_cancel = ttk.Button(frame_turbo, text="Cancelar", command=self.jobs.cancel, state="disabled")
+        self.btn_cancel.pack(side="right", padx=4)
+        self.job_label = ttk.Label(frame_turbo, text="")
+        self.job_label.pack(side="right", padx=4)
+        self.progress = ttk.Progressbar(frame_turbo, length=180, maximum=1.0)
+        self.progress.pack(side="right", padx=4)
+
         # FRAME CENTRAL: Canvas visual
         frame_center = ttk.Frame(root, padding=10)
         frame_center.pack(fill="both", expand=True)
@@ -191,8 +2316,7 @@ class HanoiGUI:
         self.canvas_diag.pack(padx=6, pady=4)
 
         ttk.Label(panel_right, text="Registro / Secuencia:").pack(anchor="nw", padx=6, pady=(6,0))
-        self.text_output = tk.Text(panel_right, width=30, height=8)
-        self.text_output.pack(padx=6, pady=4)
+        self.log_panel = SequenceLog(panel_right)
 
         self.moves = []
         self.automata = None
@@ -209,20 +2333,123 @@ class HanoiGUI:
         self.current_index = 0
         self.playing = False
 
-        # canvas drawing params
+        # canvas drawing params (recomputed from the canvas size and n by
+        # _update_geometry; these are the values for the default 640x360)
         self.peg_x = [120, 320, 520]
         self.base_y = 300
         self.peg_height = 200
         self.disk_height = 20
         self.disk_min_w = 40
         self.disk_max_w = 200
+        # pixel-budgeted rendering: below BAND_DISK_PX per disk, each peg's
+        # stack is painted into one PhotoImage band instead of disk items
+        self._band_mode = False
+        self._band_images = []
+        self._band_items = []
+        self._band_cache = [None] * len(self.peg_x)
+        self._canvas_size = None
+        # shared frame loop for disk, diagram and goal animations
+        self.animator = AnimationScheduler(self.root)
+        # retained disk items: disk -> (rect_id, text_id), and the
+        # (peg_idx, depth) each one is currently drawn at (None = hidden)
+        self._disk_items = {}
+        self._disk_slots = {}
+        # scheduler id of the disk move being animated, if any
+        self._move_anim = None
+
+        self._draw_pegs()
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+
+        # "solve from here" animation in progress
+        self._solving = False
+        # bumped whenever the manual state is replaced (reset, regenerate),
+        # so moves started before that are dropped when they complete
+        self._manual_run = 0
+
+        self.profiler = profiler
+        self._profiler_overlay = False
+        self._profiler_job = None
+        if profiler is not None:
+            profiler.attach(self, self.PROFILED_METHODS)
+            profiler.attach_scheduler(self.animator, self.canvas)
+            self.root.bind("<F12>", self.toggle_profiler_overlay)
+
+    def toggle_profiler_overlay(self, event=None):
+        """Show/hide the profiler statistics on the canvas (F12)."""
+        self._profiler_overlay = not self._profiler_overlay
+        if self._profiler_job is not None:
+            self.root.after_cancel(self._profiler_job)
+            self._profiler_job = None
+        if self._profiler_overlay:
+            self._refresh_profiler_overlay()
+        else:
+            self.canvas.delete("profiler")
 
+    def _refresh_profiler_overlay(self):
+        self._profiler_job = None
+        if not self._profiler_overlay:
+            return
+        self.canvas.delete("profiler")
+        self.profiler.sample_canvas(self.canvas)
+        text = "\n".join(self.profiler.summary_lines())
+        item = self.canvas.create_text(8, 8, text=text, anchor="nw", font=("Courier", 9),
+                                       fill="#1d3557", tags=("profiler",))
+        x1, y1, x2, y2 = self.canvas.bbox(item)
+        self.canvas.create_rectangle(x1 - 4, y1 - 4, x2 + 4, y2 + 4, fill="#ffffff", outline="#888888",
+                                     stipple="gray50", tags=("profiler",))
+        self.canvas.tag_raise(item)
+        self._profiler_job = self.root.after(self.PROFILER_REFRESH_MS, self._refresh_profiler_overlay)
+
+    # below this many pixels per disk, stacks are rendered as bitmap bands
+    BAND_DISK_PX = 4
+    # labels are only drawn on disks at least this tall
+    LABEL_DISK_PX = 12
+
+    def _canvas_dims(self):
+        w = self.canvas.winfo_width()
+        h = self.canvas.winfo_height()
+        # an unmapped canvas reports 1x1
+        return (w if w > 1 else 640), (h if h > 1 else 360)
+
+    def _update_geometry(self):
+        """Fit pegs and disks to the canvas size and the number of disks."""
+        w, h = self._canvas_dims()
+        n = self.automata.n if self.automata else 1
+        k = self.automata.pegs if self.automata else 3
+        spacing = w / (k + 0.2)
+        self.peg_x = [w/2 + (i - (k - 1) / 2) * spacing for i in range(k)]
+        self.base_y = h - 60
+        self.peg_height = max(60, h - 160)
+        self.disk_max_w = spacing
+        self.disk_min_w = min(40, spacing / 5)
+        self.disk_height = min(20, self.peg_height / n)
+        self._band_mode = self.disk_height < self.BAND_DISK_PX
+        self._canvas_size = (w, h)
+
+    def _on_canvas_configure(self, event=None):
+        # relayout on resize and redraw whatever is on screen
+        if self._canvas_dims() == self._canvas_size:
+            return
+        self._update_geometry()
         self._draw_pegs()
+        if not self.automata:
+            return
+        if self.manual_mode and self.manual_state is not None:
+            self.draw_state(tuple(tuple(peg) for peg in self.manual_state))
+            if self.manual_selected is not None:
+                self._draw_selection(self.manual_selected)
+            self.start_goal_pulse()
+        else:
+            self.draw_state(self.automata.states[self.current_index])
 
     def _draw_pegs(self):
         self.canvas.delete("all")
-        w = self.canvas.winfo_width() or 640
-        h = self.canvas.winfo_height() or 360
+        self._disk_items.clear()
+        self._disk_slots.clear()
+        self._band_images = []
+        self._band_items = []
+        self._band_cache = [None] * len(self.peg_x)
+        w, h = self._canvas_dims()
         # background nice
         self.canvas.create_rectangle(0, 0, w, h, fill="#f2f6f9", outline="")
         floor_y = self.base_y + 10
@@ -231,9 +2458,9 @@ class HanoiGUI:
             self.canvas.create_rectangle(x-5, self.base_y - self.peg_height, x+5, self.base_y, fill="#8b6b4f")
             # label
             idx = self.peg_x.index(x)
-            # if in manual mode, visually mark peg C (idx==2) as the goal
-            if getattr(self, 'manual_mode', False) and idx == 2:
-                # draw a colored halo and place a large star and 'META' label above the top of peg C
+            # if in manual mode, visually mark the last peg as the goal
+            if getattr(self, 'manual_mode', False) and idx == len(self.peg_x) - 1:
+                # draw a colored halo and place a large star and 'META' label above the top of the goal peg
                 top_y = self.base_y - self.peg_height
                 # halo slightly above the peg top
                 self.canvas.create_oval(x-40, top_y-44, x+40, top_y+8, outline="#e76f51", width=3)
@@ -247,34 +2474,108 @@ class HanoiGUI:
     def generar(self):
         try:
             n = int(self.spin_disks.get())
+            pegs = int(self.spin_pegs.get())
         except Exception:
-            messagebox.showwarning("Error", "Número de discos inválido")
+            messagebox.showwarning("Error", "Número de discos o pilones inválido")
+            return
+        self._run_job("Generando", lambda progress: SOLUTION_CACHE.get(n, pegs, progress), self._set_automata)
+
+    def _run_job(self, title, work, on_done, cleanup=None):
+        """Run `work(progress)` on the job thread, showing progress and ETA.
+
+        `on_done(result)` runs on the Tk thread; `cleanup()` after an error
+        or a cancellation (e.g. to delete a partial file).
+        """
+        if self.jobs.busy:
+            messagebox.showwarning("Ocupado", "Espera a que termine la tarea en curso o cancélala.")
             return
-        self.automata = AutomataHanoiMatricial(n)
+        self.progress.config(value=0)
+        self.job_label.config(text=f"{title}…")
+        self.btn_cancel.config(state="normal")
+
+        def on_progress(done, total, elapsed):
+            if not total:
+                return
+            self.progress.config(value=done / total)
+            eta = elapsed * (total - done) / done if done else 0
+            self.job_label.config(text=f"{title}: {done / total:.0%}, quedan {eta:.0f} s")
+
+        def finish():
+            self.progress.config(value=0)
+            self.job_label.config(text="")
+            self.btn_cancel.config(state="disabled")
+
+        def on_success(result):
+            finish()
+            on_done(result)
+
+        def on_error(e):
+            finish()
+            if cleanup:
+                cleanup()
+            messagebox.showwarning("Error", f"{title}: {e}")
+
+        def on_cancel():
+            finish()
+            if cleanup:
+                cleanup()
+            self.log_panel.log(f"{title}: cancelado.")
+
+        self.jobs.start(work, on_progress, on_success, on_error, on_cancel)
+
+    @staticmethod
+    def _discard(path):
+        # remove a partially written export
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _set_automata(self, automata):
+        # reset playback and views for a freshly built or loaded automaton
+        n = automata.n
+        self.pause()
+        # a move still in flight belongs to the old automaton
+        self._stop_solving()
+        self._cancel_manual_moves()
+        self.automata = automata
         self.moves = []
         self.current_index = 0
-        self.playing = False
-        self.text_output.delete("1.0", tk.END)
-        self.text_output.insert(tk.END, f"Autómata generado para {n} discos.\n")
-        self.text_output.insert(tk.END, f"Estados: {len(self.automata.states)}\n")
-        self.text_output.insert(tk.END, f"Movimientos esperados: {len(self.automata.sequence)}\n")
-        self.text_output.insert(tk.END, "Secuencia automática:\n")
-        self.text_output.insert(tk.END, " → ".join(self.automata.sequence) + "\n")
+        self.log_panel.clear_events()
+        self.log_panel.log(f"Autómata generado para {n} discos.")
+        self.log_panel.log(f"Estados: {len(self.automata.states)}")
+        self.log_panel.log(f"Movimientos esperados: {len(self.automata.sequence)}")
+        # the move list reads the rows it shows straight from the sequence
+        self.log_panel.set_data(self.automata.sequence)
         # draw initial state
+        self._update_geometry()
         self._draw_pegs()
         self.draw_state(self.automata.states[0])
         # initialize manual state to current state
         self.manual_state = [list(peg) for peg in self.automata.states[0]]
         self._update_info()
 
+    def _cancel_manual_moves(self):
+        # drop the disk animation in flight and invalidate pending completions
+        if self._move_anim is not None:
+            self.animator.cancel(self._move_anim)
+            self._move_anim = None
+            if self._band_mode:
+                self.canvas.delete("moving")
+                self._disk_items.clear()
+        self.animating = False
+        self._manual_run += 1
+
     def export_csv(self):
         if not self.automata:
             messagebox.showwarning("Error", "Primero genera un autómata.")
             return
         f = filedialog.asksaveasfilename(defaultextension=".csv")
         if f:
-            self.automata.export_csv(f)
-            messagebox.showinfo("Éxito", "CSV exportado correctamente.")
+            automata = self.automata
+            self._run_job("Exportando CSV", lambda progress: automata.export_csv(f, progress=progress),
+                          lambda _: messagebox.showinfo("Éxito", "CSV exportado correctamente."),
+                          lambda: self._discard(f))
 
     def export_jflap(self):
         if not self.automata:
@@ -282,33 +2583,138 @@ class HanoiGUI:
             return
         f = filedialog.asksaveasfilename(defaultextension=".jff")
         if f:
-            self.automata.export_jflap(f)
-            messagebox.showinfo("Éxito", "Archivo JFLAP exportado.")
+            automata = self.automata
+            self._run_job("Exportando JFLAP", lambda progress: automata.export_jflap(f, progress=progress),
+                          lambda _: messagebox.showinfo("Éxito", "Archivo JFLAP exportado."),
+                          lambda: self._discard(f))
+
+    def export_binary(self):
+        if not self.automata:
+            messagebox.showwarning("Error", "Primero genera un autómata.")
+            return
+        f = filedialog.asksaveasfilename(defaultextension=".hanoi")
+        if f:
+            automata = self.automata
+            self._run_job("Exportando binario", lambda progress: automata.export_binary(f, progress=progress),
+                          lambda _: messagebox.showinfo("Éxito", "Archivo binario exportado."),
+                          lambda: self._discard(f))
+
+    def open_binary(self):
+        f = filedialog.askopenfilename(filetypes=[("Solución binaria", "*.hanoi"), ("Todos", "*.*")])
+        if not f:
+            return
+        try:
+            automata = AutomataHanoiMatricial.load_binary(f)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("Error", f"No se pudo abrir el archivo: {e}")
+            return
+        self.spin_disks.set(automata.n)
+        self.spin_pegs.set(automata.pegs)
+        self._set_automata(automata)
 
     def draw_state(self, state, exclude=None):
-        # state is tuple of three tuples (pegA, pegB, pegC) (bottom..top)
+        # state is tuple of per-peg tuples (pegA, pegB, pegC, ...) (bottom..top)
         # exclude: optional tuple (peg_idx, disk_size) to skip drawing that disk (used during animation)
-        self.canvas.delete("disk")
+        # Disk items are created once and only repositioned, so a step
+        # touches just the disks whose slot changed.
+        if self._band_mode:
+            self._draw_bands(state, exclude)
+            return
         n = self.automata.n if self.automata else 1
+        if len(self._disk_items) != n:
+            self._create_disk_items(n)
+        slots = self._disk_slots
         for peg_idx, peg in enumerate(state):
-            # peg is tuple bottom..top; draw from bottom->top so larger disks appear below smaller ones
+            # peg is tuple bottom..top; depth 0 is the bottom
             for depth, disk in enumerate(peg):
+                items = self._disk_items.get(disk)
+                if items is None:
+                    continue  # state of a previous automaton with more disks
+                rect, text = items
                 if exclude and exclude[0] == peg_idx and exclude[1] == disk:
+                    if slots.get(disk) is not None:
+                        self.canvas.itemconfig(rect, state="hidden")
+                        self.canvas.itemconfig(text, state="hidden")
+                        slots[disk] = None
                     continue
-                # compute size and width
-                size = disk
-                if n > 1:
-                    w = self.disk_min_w + (size-1) * (self.disk_max_w - self.disk_min_w) / (n-1)
-                else:
-                    w = self.disk_max_w
-                x = self.peg_x[peg_idx]
-                # position from bottom: index in peg (0 bottom)
-                stack_pos = depth
-                y = self.base_y - (stack_pos + 1) * self.disk_height
-                color = self._color_for_disk(size)
-                # draw rectangle (bottom ones first, top ones later will appear above)
-                self.canvas.create_rectangle(x - w/2, y - self.disk_height + 2, x + w/2, y + 2, fill=color, outline="#333", tags=("disk",))
-                self.canvas.create_text(x, y - self.disk_height/2 + 2, text=str(size), tags=("disk",), fill="#fff")
+                slot = (peg_idx, depth)
+                old = slots.get(disk)
+                if old == slot:
+                    continue
+                self._place_disk(disk, peg_idx, depth)
+                if old is None:
+                    self.canvas.itemconfig(rect, state="normal")
+                    if self.disk_height >= self.LABEL_DISK_PX:
+                        self.canvas.itemconfig(text, state="normal")
+                slots[disk] = slot
+
+    def _draw_bands(self, state, exclude=None):
+        # one PhotoImage per peg, anchored at the peg base; only pegs whose
+        # contents changed are repainted
+        if not self._band_images:
+            width = int(self.disk_max_w) + 2
+            height = int(self.peg_height)
+            for x in self.peg_x:
+                img = tk.PhotoImage(width=width, height=height)
+                self._band_images.append(img)
+                self._band_items.append(self.canvas.create_image(x, self.base_y + 2, image=img, anchor="s", tags=("disk",)))
+        for peg_idx, peg in enumerate(state):
+            skip = exclude[1] if exclude and exclude[0] == peg_idx else None
+            key = (tuple(peg), skip)
+            if self._band_cache[peg_idx] != key:
+                self._paint_band(self._band_images[peg_idx], peg, skip)
+                self._band_cache[peg_idx] = key
+
+    def _paint_band(self, img, peg, skip=None):
+        # paint the stack bottom-up; a pixel row shared by several disks
+        # shows the lowest (widest) one, so each row is one put() at most
+        img.blank()
+        width, height = img.width(), img.height()
+        dh = self.disk_height
+        filled = 0  # pixel rows painted so far, from the bottom
+        depth = 0
+        for disk in peg:
+            if disk == skip:
+                continue
+            top = min(height, int((depth + 1) * dh))
+            depth += 1
+            if top <= filled:
+                continue
+            w = self._disk_width(disk)
+            x0 = int((width - w) / 2)
+            img.put(self._color_for_disk(disk), to=(x0, height - top, max(x0 + 1, int(x0 + w)), height - filled))
+            filled = top
+
+    def _create_disk_items(self, n):
+        # one persistent rectangle + label per disk, positioned by draw_state
+        self.canvas.delete("disk")
+        self._disk_items.clear()
+        self._disk_slots.clear()
+        for disk in range(n, 0, -1):
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, fill=self._color_for_disk(disk), outline="#333" if self.disk_height >= 8 else "", state="hidden", tags=("disk",))
+            text = self.canvas.create_text(0, 0, text=str(disk), fill="#fff", state="hidden", tags=("disk",))
+            self._disk_items[disk] = (rect, text)
+            self._disk_slots[disk] = None
+
+    def _disk_width(self, size):
+        n = self.automata.n if self.automata else 1
+        if n > 1:
+            return self.disk_min_w + (size-1) * (self.disk_max_w - self.disk_min_w) / (n-1)
+        return self.disk_max_w
+
+    def _place_disk(self, disk, peg_idx, depth):
+        # move the disk's items to `depth` (0 = bottom) on peg `peg_idx`
+        self._place_disk_at(disk, self.peg_x[peg_idx], self.base_y - (depth + 1) * self.disk_height)
+
+    def _place_disk_at(self, disk, x, y):
+        # x: disk center, y: bottom reference line of the disk slot
+        items = self._disk_items.get(disk)
+        if items is None:
+            return  # canvas was relaid out mid-animation
+        rect, text = items
+        w = self._disk_width(disk)
+        self.canvas.coords(rect, x - w/2, y - self.disk_height + 2, x + w/2, y + 2)
+        self.canvas.coords(text, x, y - self.disk_height/2 + 2)
 
     def _color_for_disk(self, size):
         # deterministic color palette based on size
@@ -320,6 +2726,8 @@ class HanoiGUI:
             # nothing to update in diagram when no automaton
             return
         st = self.automata.states[self.current_index]
+        # mark the move that led to the current state in the move list
+        self.log_panel.set_current(self.current_index - 1 if self.current_index else None)
         # textual labels removed — keep diagram updated
         # draw automaton diagram centered on current index
         self.draw_automaton_diagram()
@@ -329,7 +2737,7 @@ class HanoiGUI:
         mv = self.entry_move.get().strip()
         if mv:
             self.moves.append(mv)
-            self.text_output.insert(tk.END, f"\nMovimiento agregado: {mv}")
+            self.log_panel.log(f"Movimiento agregado: {mv}")
             self.entry_move.delete(0, tk.END)
 
     def simular_manual(self):
@@ -337,10 +2745,9 @@ class HanoiGUI:
             messagebox.showwarning("Error", "Primero genera un autómata.")
             return
         ok, msg, trace = self.automata.simulate_manual(self.moves)
-        self.text_output.insert(tk.END, "\n\n--- Simulación manual ---\n")
-        for state, move in trace:
-            self.text_output.insert(tk.END, f"{state} <- {move}\n")
-        self.text_output.insert(tk.END, f"\nResultado: {msg}\n")
+        self.log_panel.log("--- Simulación manual ---")
+        self.log_panel.log_many(f"{state} <- {move}" for state, move in trace)
+        self.log_panel.log(f"Resultado: {msg}")
 
     # playback controls
     def play(self):
@@ -350,7 +2757,62 @@ class HanoiGUI:
         if self.playing:
             return
         self.playing = True
-        self._play_step()
+        if self.turbo.get():
+            self._play_turbo()
+        else:
+            self._play_step()
+
+    def _play_turbo(self):
+        """Advance `spin_rate` steps per second, drawing only the latest state.
+
+        Runs as a looping animation on the shared scheduler, so however many
+        steps fall into one display frame, the canvas and diagram are
+        updated once per frame by jumping straight to the target index.
+        """
+        last = len(self.automata.states) - 1
+        clock = {"t": time.perf_counter(), "pos": float(self.current_index)}
+
+        def frame(_t):
+            if not self.playing or not self.automata:
+                self.animator.cancel(self._turbo_job)
+                return
+            if getattr(self, 'animating', False):
+                return
+            now = time.perf_counter()
+            clock["pos"] += (now - clock["t"]) * self._turbo_rate()
+            clock["t"] = now
+            target = min(int(clock["pos"]), last)
+            if target != self.current_index:
+                self._jump_to(target)
+            if target >= last:
+                self.playing = False
+                self.animator.cancel(self._turbo_job)
+
+        self._turbo_job = None
+        self._turbo_job = self.animator.start(1.0, frame, loop=True)
+
+    def _turbo_rate(self):
+        try:
+            return max(1, int(float(self.spin_rate.get())))
+        except ValueError:
+            return 1000
+
+    def _jump_to(self, index):
+        # show state `index` directly, without animating the moves in between
+        self.current_index = index
+        self.draw_state(self.automata.states[index])
+        self._update_info()
+
+    def goto_step(self):
+        if not self.automata or self.manual_mode or getattr(self, 'animating', False):
+            return
+        try:
+            index = int(self.entry_goto.get())
+        except ValueError:
+            messagebox.showwarning("Error", "Número de paso inválido")
+            return
+        self.pause()
+        self._jump_to(max(0, min(index, len(self.automata.states) - 1)))
 
     def _play_step(self):
         if not self.playing:
@@ -398,150 +2860,140 @@ class HanoiGUI:
         self.animating = True
         self.animate_move(src, dst, disk, start, end, lambda: self._on_animation_done())
 
+    # diagram row styles (see LinearDiagram)
+    DIAG_MAIN_STYLE = {"fill": "#ffffff", "outline": "#666", "text": "#000",
+                       "current_fill": "#2a9d8f", "current_outline": "#0b3d2e", "current_text": "#fff",
+                       "arrow": "#aaa", "arrow_current": "#e76f51"}
+    DIAG_PATH_STYLE = {"fill": "#ffffff", "outline": "#888", "text": "#000",
+                       "current_fill": "#264653", "current_outline": "#264653", "current_text": "#fff",
+                       "arrow": "#e9c46a", "arrow_current": None, "font": ("Arial", 8),
+                       "edge_font": ("Arial", 7), "edge_fill": "#b35f00"}
+    DIAG_MANUAL_STYLE = {"fill": "#fff", "outline": "#666", "text": "#000",
+                         "current_fill": "#2a9d8f", "current_outline": "#0b3d2e", "current_text": "#fff",
+                         "arrow": "#888", "arrow_current": None, "edge_font": ("Arial", 8), "edge_fill": "#333"}
+    DIAG_NODES = 11
+    DIAG_MANUAL_NODES = 7
+
+    def _diagram_layout(self):
+        """Persistent diagram items for the current mode and canvas size.
+
+        Everything is rebuilt only when the mode or size changes; otherwise
+        the same rows are returned and updated in place.
+        """
+        w = int(self.canvas_diag.winfo_width() or 240)
+        h = int(self.canvas_diag.winfo_height() or 120)
+        manual = bool(getattr(self, 'manual_mode', False))
+        key = (manual, w, h)
+        layout = getattr(self, '_diag_layout', None)
+        if layout is not None and layout["key"] == key:
+            return layout
+        c = self.canvas_diag
+        c.delete("all")
+        layout = {"key": key, "w": w, "h": h}
+        if manual:
+            layout["title"] = c.create_text(w//2, 12, text="Tu diagrama (manual)", fill="#222", font=("Arial", 10, "bold"))
+            layout["manual"] = LinearDiagram(c, self.DIAG_MANUAL_NODES, h//2, 14, 16, w, self.DIAG_MANUAL_STYLE)
+        else:
+            layout["main"] = LinearDiagram(c, self.DIAG_NODES, h//2, 12, 16, w, self.DIAG_MAIN_STYLE)
+            layout["transition"] = c.create_text(w//2, h-14, text="", fill="#222", font=("Arial", 9))
+            layout["path_title"] = c.create_text(w//2, int(h*0.57), text="Ruta manual:", fill="#333", font=("Arial", 8, "italic"), state="hidden")
+            layout["path"] = LinearDiagram(c, self.DIAG_NODES, int(h * 0.75), 8, 12, w, self.DIAG_PATH_STYLE)
+        self._diag_layout = layout
+        return layout
+
+    def _diagram_window(self):
+        # window of at most DIAG_NODES indices centered on current_index
+        total = len(self.automata.states)
+        max_nodes = self.DIAG_NODES
+        start = max(0, self.current_index - max_nodes // 2)
+        end = min(total, start + max_nodes)
+        if end - start < max_nodes:
+            start = max(0, end - max_nodes)
+        return start, end
+
+    def _show_manual_path(self, row, m_nodes, m_edges):
+        # the newest manual nodes, as many as the row holds
+        count = min(len(m_nodes), row.slots)
+        start = len(m_nodes) - count
+        row.show(start, count, len(m_nodes) - 1, str,
+                 lambda i: m_edges[i][2] if i < len(m_edges) else "")
+
     def draw_automaton_diagram(self):
         """Draw a compact linear diagram of states centered on the current index.
+
+        Node items persist between calls (see `_diagram_layout`); only the
+        labels and colours that changed are updated.
         """
+        m_nodes = getattr(self, 'manual_diagram_nodes', []) or []
+        m_edges = getattr(self, 'manual_diagram_edges', []) or []
         # If manual mode is active, show only the manual diagram
         if getattr(self, 'manual_mode', False):
-            self.canvas_diag.delete("all")
-            # draw only user's manual path
-            m_nodes = getattr(self, 'manual_diagram_nodes', []) or []
-            m_edges = getattr(self, 'manual_diagram_edges', []) or []
-            # If no manual nodes, show a hint
-            w = int(self.canvas_diag.winfo_width() or 240)
-            h = int(self.canvas_diag.winfo_height() or 120)
-            if not m_nodes:
-                self.canvas_diag.create_text(w//2, h//2, text="Aún no has hecho movimientos.", fill="#666")
-                # show goal indicator
-                
-                return
-            # draw a focused manual diagram centered
-            # reuse compact drawer
-            self.draw_compact_diagram(self.canvas_diag, m_nodes, m_edges, highlight_idx=len(m_nodes)-1, title="Tu diagrama (manual)")
-            # visual goal indicator for peg C
-            self.canvas_diag.create_text(w-48, 14, text="", fill="#e76f51", font=("Arial", 9, "bold"))
+            layout = self._diagram_layout()
+            self._show_manual_path(layout["manual"], m_nodes, m_edges)
             return
         if not self.automata:
             self.canvas_diag.delete("all")
+            self._diag_layout = None
             return
-        total = len(self.automata.states)
-        max_nodes = 11
-        # determine window centered at current_index
-        center = self.current_index
-        half = max_nodes // 2
-        start = max(0, center - half)
-        end = min(total, start + max_nodes)
-        if end - start < max_nodes:
-            start = max(0, end - max_nodes)
-
-        self.canvas_diag.delete("all")
-        w = int(self.canvas_diag.winfo_width() or 240)
-        h = int(self.canvas_diag.winfo_height() or 120)
-        pad = 16
-        count = end - start
-        if count <= 0:
-            return
-        spacing = (w - 2*pad) / max(1, count-1)
-        r = 12
-        y = h//2
-        for idx in range(start, end):
-            x = int(pad + (idx - start) * spacing)
-            is_current = (idx == self.current_index)
-            fill = "#2a9d8f" if is_current else "#ffffff"
-            outline = "#0b3d2e" if is_current else "#666"
-            self.canvas_diag.create_oval(x-r, y-r, x+r, y+r, fill=fill, outline=outline, width=2)
-            # small label
-            label = f"q{idx}"
-            self.canvas_diag.create_text(x, y, text=label, fill="#fff" if is_current else "#000")
-            # draw arrow to next
-            if idx < end-1:
-                x2 = int(pad + (idx+1 - start) * spacing)
-                # highlight arrow if this is the current transition
-                arrow_color = "#e76f51" if idx == self.current_index else "#aaa"
-                self.canvas_diag.create_line(x+r, y, x2-r, y, arrow=tk.LAST, fill=arrow_color, width=2)
+        layout = self._diagram_layout()
+        start, end = self._diagram_window()
+        layout["main"].show(start, end - start, self.current_index, lambda i: f"q{i}")
         # legend: current transition text
-        if self.current_index < total-1:
-            mv = self.automata.sequence[self.current_index]
-            self.canvas_diag.create_text(w//2, h-14, text=f"Transición: {mv}", fill="#222", font=("Arial", 9))
-
-        # ---- Draw manual path (if any) below the main diagram ----
-        if getattr(self, 'manual_diagram_nodes', None):
-            m_nodes = self.manual_diagram_nodes
-            m_edges = self.manual_diagram_edges
-            if m_nodes:
-                # draw manual nodes in lower third
-                y_manual = int(h * 0.75)
-                # compute layout: spread across width
-                pad_m = 12
-                count = max(1, len(m_nodes))
-                spacing_m = (w - 2*pad_m) / max(1, count-1)
-                r_m = 8
-                # title
-                self.canvas_diag.create_text(w//2, int(h*0.57), text="Ruta manual:", fill="#333", font=("Arial", 8, "italic"))
-                for i, node in enumerate(m_nodes):
-                    x = int(pad_m + i * spacing_m)
-                    is_last = (i == len(m_nodes)-1)
-                    fill = "#264653" if is_last else "#ffffff"
-                    outline = "#264653" if is_last else "#888"
-                    self.canvas_diag.create_oval(x-r_m, y_manual-r_m, x+r_m, y_manual+r_m, fill=fill, outline=outline, width=2)
-                    # tiny label with index
-                    self.canvas_diag.create_text(x, y_manual, text=str(i), fill="#fff" if is_last else "#000", font=("Arial", 8))
-                # edges
-                for e in m_edges:
-                    fx, tx, mv = e
-                    x1 = int(pad_m + fx * spacing_m)
-                    x2 = int(pad_m + tx * spacing_m)
-                    self.canvas_diag.create_line(x1+r_m, y_manual, x2-r_m, y_manual, arrow=tk.LAST, fill="#e9c46a", width=2)
-                    # label midway
-                    xm = (x1 + x2)//2
-                    self.canvas_diag.create_text(xm, y_manual-12, text=mv, fill="#b35f00", font=("Arial", 7))
+        if self.current_index < len(self.automata.sequence):
+            text = f"Transición: {self.automata.sequence[self.current_index]}"
+        else:
+            text = ""
+        if layout.get("transition_text") != text:
+            self.canvas_diag.itemconfig(layout["transition"], text=text)
+            layout["transition_text"] = text
+
+        # ---- manual path (if any) below the main diagram ----
+        has_path = bool(m_nodes)
+        if layout.get("path_shown") != has_path:
+            self.canvas_diag.itemconfig(layout["path_title"], state="normal" if has_path else "hidden")
+            layout["path_shown"] = has_path
+        if has_path:
+            self._show_manual_path(layout["path"], m_nodes, m_edges)
+        else:
+            layout["path"].show(0, 0, None, str)
 
     def animate_diagram_move(self, old_idx, new_idx):
         # animate a highlight moving from old_idx to new_idx within the current window
         if not self.automata:
             return
-        total = len(self.automata.states)
-        max_nodes = 11
-        center = self.current_index
-        half = max_nodes // 2
-        start = max(0, center - half)
-        end = min(total, start + max_nodes)
-        if end - start < max_nodes:
-            start = max(0, end - max_nodes)
-
-        w = int(self.canvas_diag.winfo_width() or 240)
-        h = int(self.canvas_diag.winfo_height() or 120)
-        pad = 16
-        count = end - start
-        if count <= 0:
+        start, end = self._diagram_window()
+        if end - start <= 0:
             return
-        spacing = (w - 2*pad) / max(1, count-1)
-
-        # compute positions; if new_idx outside window, just set current_index and redraw
-        if not (start <= old_idx < end) or not (start <= new_idx < end):
+        layout = self._diagram_layout()
+        # compute positions; if new_idx outside window (or the main row is
+        # not shown, as in manual mode), just set current_index and redraw
+        if "main" not in layout or not (start <= old_idx < end) or not (start <= new_idx < end):
             self.current_index = new_idx
             self.draw_automaton_diagram()
             return
+        h = layout["h"]
+        main = layout["main"]
+        if main.count != end - start:
+            self.draw_automaton_diagram()
 
-        x_old = int(pad + (old_idx - start) * spacing)
-        x_new = int(pad + (new_idx - start) * spacing)
+        x_old = main.x_of(old_idx - start)
+        x_new = main.x_of(new_idx - start)
         y = h//2
         r = 14
 
         overlay = self.canvas_diag.create_oval(x_old-r, y-r, x_old+r, y+r, fill="#264653", outline="#000", width=2, tags=("overlay",))
         steps = max(4, int(abs(x_new - x_old) / 6))
-        dx = (x_new - x_old) / steps
 
-        def step(i=0):
-            if i < steps:
-                self.canvas_diag.move(overlay, dx, 0)
-                self.root.after(30, lambda: step(i+1))
-            else:
-                self.canvas_diag.delete(overlay)
-                self.current_index = new_idx
-                self.draw_automaton_diagram()
+        def frame(t):
+            x = x_old + (x_new - x_old) * t
+            self.canvas_diag.coords(overlay, x-r, y-r, x+r, y+r)
 
-        step()
+        def done():
+            self.canvas_diag.delete(overlay)
+            self.current_index = new_idx
+            self.draw_automaton_diagram()
+
+        self.animator.start(steps * 0.03, frame, done)
 
     # --- Manual interaction helpers ---
     def toggle_manual(self):
@@ -559,7 +3011,7 @@ class HanoiGUI:
             self.manual_diagram_edges = []
             self.manual_selected = None
             self.canvas.bind("<Button-1>", self.on_canvas_click)
-            self.text_output.insert(tk.END, "\nModo manual activado. Clic en un poste para seleccionar, luego clic en destino para mover.\n")
+            self.log_panel.log("Modo manual activado. Clic en un poste para seleccionar, luego clic en destino para mover.")
             # disable playback controls while manual active
             self.disable_playback_controls(True)
             # start pulsing goal marker above peg C
@@ -570,11 +3022,13 @@ class HanoiGUI:
                 pass
         else:
             # disable manual
+            self._stop_solving()
+            self.canvas.delete("hint")
             self.btn_manual.config(text="Modo Manual")
             self.manual_selected = None
             self.canvas.unbind("<Button-1>")
             self.canvas.delete("selection")
-            self.text_output.insert(tk.END, "\nModo manual desactivado.\n")
+            self.log_panel.log("Modo manual desactivado.")
             # re-enable playback controls
             self.disable_playback_controls(False)
         pass
@@ -590,34 +3044,38 @@ class HanoiGUI:
     def reset_manual(self):
         if not self.automata:
             return
+        self._stop_solving()
+        self._cancel_manual_moves()
+        self.canvas.delete("hint")
         self.manual_state = [list(peg) for peg in self.automata.states[0]]
         self.draw_state(tuple(tuple(peg) for peg in self.manual_state))
         self.manual_selected = None
         self.canvas.delete("selection")
-        self.text_output.insert(tk.END, "\nEstado manual reseteado a la configuración inicial.\n")
+        self.log_panel.log("Estado manual reseteado a la configuración inicial.")
         # reset manual diagram as well
         self.manual_diagram_nodes = [tuple(tuple(peg) for peg in self.manual_state)]
         self.manual_diagram_edges = []
         self.draw_automaton_diagram()
 
     def on_canvas_click(self, event):
-        if not self.manual_mode or getattr(self, 'animating', False):
+        if not self.manual_mode or getattr(self, 'animating', False) or self._solving:
             return
+        self.canvas.delete("hint")
         x = event.x
         # find nearest peg
         distances = [abs(x - px) for px in self.peg_x]
         peg_idx = distances.index(min(distances))
-        if min(distances) > 120:
+        if min(distances) > 0.6 * (self.peg_x[1] - self.peg_x[0]):
             return
         # selection flow
         if self.manual_selected is None:
             # select source if it has disks
             if not self.manual_state[peg_idx]:
-                self.text_output.insert(tk.END, f"\nEl poste {chr(65+peg_idx)} está vacío. Selecciona otro poste.\n")
+                self.log_panel.log(f"El poste {chr(65+peg_idx)} está vacío. Selecciona otro poste.")
                 return
             self.manual_selected = peg_idx
             self._draw_selection(peg_idx)
-            self.text_output.insert(tk.END, f"\nSeleccionado poste {chr(65+peg_idx)}\n")
+            self.log_panel.log(f"Seleccionado poste {chr(65+peg_idx)}")
         else:
             src = self.manual_selected
             dst = peg_idx
@@ -628,7 +3086,7 @@ class HanoiGUI:
                 return
             # validate move
             if not self.manual_state[src]:
-                self.text_output.insert(tk.END, "\nSeleccion inválida (vacío).\n")
+                self.log_panel.log("Seleccion inválida (vacío).")
                 self.manual_selected = None
                 self.canvas.delete("selection")
                 return
@@ -647,58 +3105,50 @@ class HanoiGUI:
             end_state_list[dst].append(disk)
             end_state = tuple(tuple(peg) for peg in end_state_list)
             self.animating = True
+            run = self._manual_run
             # animate_move will draw end_state at the end; on_done update manual_state
-            def on_done():
-                self.animating = False
-                self.manual_state = end_state_list
-                self.manual_selected = None
-                self.canvas.delete("selection")
-                self.text_output.insert(tk.END, f"\nMovimiento: {chr(65+src)}->{chr(65+dst)}\n")
-
-            # after manual move completes, check if manual_state matches an automaton state
             def on_done_with_sync():
-                on_done()
-                # append to manual diagram path
-                new_node = tuple(tuple(peg) for peg in self.manual_state)
-                from_idx = len(self.manual_diagram_nodes) - 1
-                to_idx = from_idx + 1
-                mv_str = f"{chr(65+src)}->{chr(65+dst)}"
-                self.manual_diagram_nodes.append(new_node)
-                self.manual_diagram_edges.append((from_idx, to_idx, mv_str))
-                # redraw to show updated manual path
-                self.draw_automaton_diagram()
-                # if the manual configuration matches an automaton state, animate main diagram
-                target = new_node
-                try:
-                    idx = self.automata.states.index(target)
-                except ValueError:
-                    idx = None
-                if idx is not None:
-                    old = self.current_index
-                    self.animate_diagram_move(old, idx)
-                    # if we reached the final automaton state, show congratulations and both diagrams
-                    try:
-                        final_state = self.automata.states[-1]
-                    except Exception:
-                        final_state = None
-                    if final_state is not None and tuple(tuple(peg) for peg in self.manual_state) == final_state:
-                        # show completion dialog
-                        self.show_completion_dialog()
+                self._after_manual_move(src, dst, end_state_list, run)
 
             self.animate_move(src, dst, disk, start_state, end_state, on_done_with_sync)
 
+    def _after_manual_move(self, src, dst, end_state_list, run):
+        # bookkeeping once a manual move has been animated; `run` is the
+        # _manual_run the move was started in
+        if run != self._manual_run:
+            return  # manual state was reset or regenerated meanwhile
+        self.animating = False
+        self.manual_state = end_state_list
+        self.manual_selected = None
+        self.canvas.delete("selection")
+        self.log_panel.log(f"Movimiento: {chr(65+src)}->{chr(65+dst)}")
+        # append to manual diagram path
+        new_node = tuple(tuple(peg) for peg in self.manual_state)
+        from_idx = len(self.manual_diagram_nodes) - 1
+        to_idx = from_idx + 1
+        mv_str = f"{chr(65+src)}->{chr(65+dst)}"
+        self.manual_diagram_nodes.append(new_node)
+        self.manual_diagram_edges.append((from_idx, to_idx, mv_str))
+        # redraw to show updated manual path
+        self.draw_automaton_diagram()
+        # if the manual configuration matches an automaton state, animate main diagram
+        idx = self.automata.index_of(new_node)
+        if idx is not None:
+            old = self.current_index
+            self.animate_diagram_move(old, idx)
+            # if we reached the final automaton state, show congratulations and both diagrams
+            if idx == len(self.automata.states) - 1:
+                self._stop_solving()
+                self.show_completion_dialog()
+
     def _draw_selection(self, peg_idx):
         # draw a highlight rectangle around top disk of peg
         self.canvas.delete("selection")
         peg = self.manual_state[peg_idx]
         if not peg:
             return
-        n = self.automata.n if self.automata else 1
         disk = peg[-1]
-        if n > 1:
-            w = self.disk_min_w + (disk-1) * (self.disk_max_w - self.disk_min_w) / (n-1)
-        else:
-            w = self.disk_max_w
+        w = self._disk_width(disk)
         x = self.peg_x[peg_idx]
         stack_pos = len(peg)-1
         y = self.base_y - (stack_pos + 1) * self.disk_height
@@ -706,7 +3156,7 @@ class HanoiGUI:
 
     def _indicate_invalid_move(self, dst, disk):
         # shake left canvas to indicate invalid move and log error
-        self.text_output.insert(tk.END, f"\nMovimiento inválido: no se puede colocar disco {disk} sobre uno más pequeño en {chr(65+dst)}\n")
+        self.log_panel.log(f"Movimiento inválido: no se puede colocar disco {disk} sobre uno más pequeño en {chr(65+dst)}")
         pattern = [-10, 20, -16, 12, -6, 0]
         def do_shake(i=0):
             if i >= len(pattern):
@@ -718,6 +3168,10 @@ class HanoiGUI:
 
     def pause(self):
         self.playing = False
+        job = getattr(self, '_turbo_job', None)
+        if job:
+            self.animator.cancel(job)
+            self._turbo_job = None
 
     def _on_animation_done(self):
         self.animating = False
@@ -742,6 +3196,7 @@ class HanoiGUI:
             self.btn_pause.config(state=state)
             self.btn_prev.config(state=state)
             self.btn_next.config(state=state)
+            self.btn_goto.config(state=state)
         except Exception:
             pass
 
@@ -820,118 +3275,62 @@ class HanoiGUI:
         start_y = self.base_y - (start_stack_pos + 1) * self.disk_height
         end_y = self.base_y - (end_stack_pos + 1) * self.disk_height
 
-        n = self.automata.n if self.automata else 1
-        size = disk
-        if n > 1:
-            w = self.disk_min_w + (size-1) * (self.disk_max_w - self.disk_min_w) / (n-1)
+        if self._band_mode:
+            # bands hold no per-disk items: paint the stack without the disk
+            # and animate a temporary one
+            self.draw_state(start_state, exclude=(src, disk))
+            self._disk_items[disk] = (
+                self.canvas.create_rectangle(0, 0, 0, 0, fill=self._color_for_disk(disk), outline="", tags=("moving",)),
+                self.canvas.create_text(0, 0, text="", tags=("moving",)))
         else:
-            w = self.disk_max_w
-        color = self._color_for_disk(size)
-
-        # prepare static drawing without the moving disk
-        self.draw_state(start_state, exclude=(src, disk))
-
-        # create moving disk
-        rect = self.canvas.create_rectangle(start_x - w/2, start_y - self.disk_height + 2, start_x + w/2, start_y + 2, fill=color, outline="#333", tags=("moving",))
-        text = self.canvas.create_text(start_x, start_y - self.disk_height/2 + 2, text=str(size), fill="#fff", tags=("moving",))
-
-        # animation timing
+            # draw the start state and lift the disk's own items above the rest
+            self.draw_state(start_state)
+            rect, text = self._disk_items[disk]
+            self.canvas.tag_raise(rect)
+            self.canvas.tag_raise(text)
+            # its slot is stale from here on; draw_state(end_state) re-places it
+            self._disk_slots[disk] = (-1, -1)
+
+        # animation timing: lift 25%, horizontal 50%, drop 25% of the time
         total_ms = max(200, int(700 / max(0.2, min(self.speed.get(), 2.0))))
-        lift_ms = int(total_ms * 0.25)
-        horiz_ms = int(total_ms * 0.5)
-        drop_ms = int(total_ms * 0.25)
 
         # compute lift to a safe y above pegs
         top_y = self.base_y - self.peg_height - 20
 
-        steps_lift = max(3, int(lift_ms / 30))
-        steps_horiz = max(3, int(horiz_ms / 30))
-        steps_drop = max(3, int(drop_ms / 30))
-
-        dx_lift = 0
-        dy_lift = (top_y - start_y) / steps_lift
-
-        dx_horiz = (end_x - start_x) / steps_horiz
-        dy_horiz = 0
-
-        dx_drop = 0
-        dy_drop = (end_y - top_y) / steps_drop
-
-        # step counters
-        state = {"phase": "lift", "i": 0}
-
-        def step():
-            if state["phase"] == "lift":
-                if state["i"] < steps_lift:
-                    self.canvas.move(rect, dx_lift, dy_lift)
-                    self.canvas.move(text, dx_lift, dy_lift)
-                    state["i"] += 1
-                    self.root.after(30, step)
-                else:
-                    state["phase"] = "horiz"
-                    state["i"] = 0
-                    step()
-            elif state["phase"] == "horiz":
-                if state["i"] < steps_horiz:
-                    self.canvas.move(rect, dx_horiz, dy_horiz)
-                    self.canvas.move(text, dx_horiz, dy_horiz)
-                    state["i"] += 1
-                    self.root.after(30, step)
-                else:
-                    state["phase"] = "drop"
-                    state["i"] = 0
-                    step()
-            elif state["phase"] == "drop":
-                if state["i"] < steps_drop:
-                    self.canvas.move(rect, dx_drop, dy_drop)
-                    self.canvas.move(text, dx_drop, dy_drop)
-                    state["i"] += 1
-                    self.root.after(30, step)
-                else:
-                    # end animation: remove moving items and draw end state
-                    self.canvas.delete("moving")
-                    self.draw_state(end_state)
-                    if on_done:
-                        on_done()
+        def frame(t):
+            if t < 0.25:
+                x, y = start_x, start_y + (top_y - start_y) * (t / 0.25)
+            elif t < 0.75:
+                x, y = start_x + (end_x - start_x) * ((t - 0.25) / 0.5), top_y
+            else:
+                x, y = end_x, top_y + (end_y - top_y) * ((t - 0.75) / 0.25)
+            self._place_disk_at(disk, x, y)
+
+        def done():
+            # end animation: snap to the end state
+            self._move_anim = None
+            if self._band_mode:
+                self.canvas.delete("moving")
+                self._disk_items.pop(disk, None)
+            self.draw_state(end_state)
+            if on_done:
+                on_done()
 
-        # start animation
-        step()
+        self._move_anim = self.animator.start(total_ms / 1000, frame, done)
 
     def draw_compact_diagram(self, canvas_obj, nodes, edges, highlight_idx=None, title=None):
         """Draw a simple horizontal diagram on `canvas_obj` from `nodes` and `edges`.
 
         - `nodes`: list of state objects (can be any printable identifier)
-        - `edges`: list of (from_idx, to_idx, label)
+        - `edges`: list of (from_idx, to_idx, label), edges[i] leaving node i
         - `highlight_idx`: index to emphasize
+
+        Large paths are drawn at a reduced level of detail (see
+        `CompactDiagram`); only `len(nodes)` and the visible edges are read.
         """
-        canvas_obj.delete("all")
-        w = int(canvas_obj.winfo_width() or 360)
-        h = int(canvas_obj.winfo_height() or 200)
-        pad = 16
-        count = max(1, len(nodes))
-        spacing = (w - 2*pad) / max(1, count-1)
-        r = 14
-        y = h//2
-        # optional title
-        if title:
-            canvas_obj.create_text(w//2, 12, text=title, fill="#222", font=("Arial", 10, "bold"))
-        for i in range(len(nodes)):
-            x = int(pad + i * spacing)
-            is_current = (i == highlight_idx)
-            fill = "#2a9d8f" if is_current else "#fff"
-            outline = "#0b3d2e" if is_current else "#666"
-            canvas_obj.create_oval(x-r, y-r, x+r, y+r, fill=fill, outline=outline, width=2)
-            canvas_obj.create_text(x, y, text=f"{i}", fill="#fff" if is_current else "#000")
-        # draw edges with labels
-        for e in edges:
-            fx, tx, mv = e
-            if fx < 0 or tx < 0 or fx >= len(nodes) or tx >= len(nodes):
-                continue
-            x1 = int(pad + fx * spacing)
-            x2 = int(pad + tx * spacing)
-            canvas_obj.create_line(x1+r, y, x2-r, y, arrow=tk.LAST, fill="#888", width=2)
-            xm = (x1 + x2)//2
-            canvas_obj.create_text(xm, y-12, text=mv, fill="#333", font=("Arial", 8))
+        view = CompactDiagram(canvas_obj, len(nodes), edges, highlight_idx, title)
+        view.render()
+        return view
 
     def show_completion_dialog(self):
         """Show a popup congratulating the user and displaying both diagrams.
@@ -956,10 +3355,8 @@ class HanoiGUI:
         right = tk.Canvas(frame, width=360, height=260, bg="#fff", highlightthickness=1, highlightbackground="#ccc")
         right.pack(side="right", padx=6, pady=6)
 
-        # prepare automaton edges (consecutive transitions)
-        auto_edges = []
-        for i, mv in enumerate(self.automata.sequence):
-            auto_edges.append((i, i+1, mv))
+        # automaton edges (consecutive transitions), built on access
+        auto_edges = ChainEdges(self.automata.sequence)
 
         # manual edges are already stored
         manual_edges = list(self.manual_diagram_edges)
@@ -973,30 +3370,100 @@ class HanoiGUI:
         ttk.Button(top, text="Cerrar", command=top.destroy).pack(pady=6)
 
     def show_hint(self):
-        # hint feature removed; no-op
-        return
+        """Point at the optimal next move from the manual configuration."""
+        if not self.automata or not self.manual_mode:
+            self.log_panel.log("La pista está disponible en modo manual.")
+            return
+        self.canvas.delete("hint")
+        state = tuple(tuple(peg) for peg in self.manual_state)
+        try:
+            move = self.automata.next_move(state)
+            remaining = self.automata.distance_to_goal(state)
+        except ValueError as e:
+            self.log_panel.log(f"Sin pista: {e}")
+            return
+        if move is None:
+            self.log_panel.log("La torre ya está resuelta.")
+            return
+        disk, src, dst = move
+        # arrow from the top of the source stack to above the destination peg
+        x0, x1 = self.peg_x[src], self.peg_x[dst]
+        y0 = self.base_y - len(self.manual_state[src]) * self.disk_height - 6
+        y1 = self.base_y - (len(self.manual_state[dst]) + 1) * self.disk_height
+        top = self.base_y - self.peg_height - 10
+        self.canvas.create_line(x0, y0, x0, top, x1, top, x1, y1, arrow="last", width=3,
+                                fill="#2a9d8f", dash=(6, 3), tags=("hint",))
+        self.log_panel.log(f"Pista: mueve el disco {disk} de {chr(65+src)} a {chr(65+dst)} "
+                                        f"(faltan {remaining} movimientos).")
+
+    def _stop_solving(self):
+        # the move being animated finishes; no further moves are started
+        self._solving = False
+        self.btn_solve.config(text="Resolver desde aquí")
+
+    def solve_from_here(self):
+        """Animate the optimal solution from the manual configuration; click again to stop."""
+        if not self.automata:
+            return
+        if self._solving:
+            self._stop_solving()
+            return
+        if getattr(self, 'animating', False):
+            return
+        if not self.manual_mode:
+            self.toggle_manual()
+        self.canvas.delete("hint")
+        self.canvas.delete("selection")
+        self.manual_selected = None
+        try:
+            moves = self.automata.solve_from(tuple(tuple(peg) for peg in self.manual_state))
+            first = next(moves, None)
+        except ValueError as e:
+            self.log_panel.log(f"No se puede resolver desde aquí: {e}")
+            return
+        if first is None:
+            self.log_panel.log("La torre ya está resuelta.")
+            return
+        self._solving = True
+        self.btn_solve.config(text="Detener")
+        run = self._manual_run
+
+        def step(move):
+            if run != self._manual_run:
+                return  # superseded by a reset or a new automaton
+            if move is None or not self._solving or not self.manual_mode:
+                self._stop_solving()
+                return
+            disk, src, dst = move
+            start_state = tuple(tuple(peg) for peg in self.manual_state)
+            end_state_list = [list(peg) for peg in self.manual_state]
+            end_state_list[src].pop()
+            end_state_list[dst].append(disk)
+
+            def done():
+                self._after_manual_move(src, dst, end_state_list, run)
+                step(next(moves, None))
+
+            self.animating = True
+            self.animate_move(src, dst, disk, start_state, tuple(map(tuple, end_state_list)), done)
+
+        step(first)
 
     def start_goal_pulse(self):
-        """Start a pulsing animation above peg C. Idempotent."""
+        """Start a pulsing animation above the goal (last) peg. Idempotent."""
         try:
             self.stop_goal_pulse()
         except Exception:
             pass
-        x = self.peg_x[2]
+        x = self.peg_x[-1]
         top_y = self.base_y - self.peg_height
         halo = self.canvas.create_oval(x-40, top_y-44, x+40, top_y+8, outline="#e76f51", width=3, tags=("goal_pulse",))
         star = self.canvas.create_text(x, top_y-24, text="★", font=("Arial", 20), fill="#f4a261", tags=("goal_pulse",))
-        label = self.canvas.create_text(x, top_y-48, text=f"C  (META)", font=("Arial", 12, "bold"), fill="#e76f51", tags=("goal_pulse",))
-        self._goal_pulse = {"x": x, "top_y": top_y, "phase": 0, "dir": 1, "job": None, "steps": 8}
-
-        def pulse_step():
-            st = self._goal_pulse
-            steps = st["steps"]
-            i = st["phase"]
-            t = (i / (steps-1))
-            scale = 1.0 + 0.18 * (0.5 - 0.5 * (__import__("math").cos(t * 2 * __import__("math").pi)))
-            x = st["x"]
-            top_y = st["top_y"]
+        label = self.canvas.create_text(x, top_y-48, text=f"{chr(64 + len(self.peg_x))}  (META)", font=("Arial", 12, "bold"), fill="#e76f51", tags=("goal_pulse",))
+        self._goal_pulse = {"x": x, "top_y": top_y, "job": None}
+
+        def pulse_frame(t):
+            scale = 1.0 + 0.18 * (0.5 - 0.5 * math.cos(t * 2 * math.pi))
             r = int(40 * scale)
             try:
                 self.canvas.coords(halo, x-r, top_y-(r+4), x+r, top_y+(r/2))
@@ -1005,12 +3472,9 @@ class HanoiGUI:
                 self.canvas.itemconfig(star, font=("Arial", star_size))
             except Exception:
                 pass
-            st["phase"] += st["dir"]
-            if st["phase"] >= steps - 1 or st["phase"] <= 0:
-                st["dir"] *= -1
-            st["job"] = self.root.after(100, pulse_step)
 
-        self._goal_pulse["job"] = self.root.after(150, pulse_step)
+        # one swell-and-shrink every 0.7 s, until stop_goal_pulse
+        self._goal_pulse["job"] = self.animator.start(0.7, pulse_frame, loop=True)
 
     def stop_goal_pulse(self):
         """Stop and remove pulse overlay items."""
@@ -1018,10 +3482,7 @@ class HanoiGUI:
         if st:
             job = st.get('job')
             if job:
-                try:
-                    self.root.after_cancel(job)
-                except Exception:
-                    pass
+                self.animator.cancel(job)
         try:
             self.canvas.delete("goal_pulse")
         except Exception:
@@ -1029,7 +3490,161 @@ class HanoiGUI:
         self._goal_pulse = None
 
 
-if __name__ == "__main__":
+def run_gui(profile=None):
+    """Open the GUI. `profile` enables the profiler: True, or a path where the
+    statistics are written as JSON on exit. Defaults to $HANOI_PROFILE
+    ("1" or a path)."""
+    _load_tk()
+    if profile is None:
+        profile = os.environ.get("HANOI_PROFILE") or None
+        if profile == "1":
+            profile = True
+    profiler = Profiler() if profile else None
     root = tk.Tk()
-    app = HanoiGUI(root)
-    root.mainloop()
+    app = HanoiGUI(root, profiler)
+    try:
+        root.mainloop()
+    finally:
+        if profiler is not None and isinstance(profile, str):
+            profiler.dump(profile)
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="TowerOfHanoi.py",
+        description="Autómata Torre de Hanoi. Sin argumentos abre la interfaz gráfica.")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("gui", help="abrir la interfaz gráfica")
+    p.add_argument("--profile", nargs="?", const=True, default=None, metavar="FILE",
+                   help="activar el perfilador (F12 muestra el panel); con FILE guarda JSON al salir")
+
+    p = sub.add_parser("generate", help="resumen de la solución óptima")
+    p.add_argument("n", type=int, help="número de discos")
+    p.add_argument("--pegs", type=int, default=3, help="número de pilones (más de 3: Frame-Stewart)")
+    p.add_argument("--moves", action="store_true", help="escribir también un movimiento por línea")
+
+    p = sub.add_parser("export", help="exportar la solución a un archivo")
+    p.add_argument("format", choices=("csv", "jflap", "binary", "statespace"),
+                   help="statespace: autómata completo de 3^n estados en JFLAP")
+    p.add_argument("n", type=int, help="número de discos")
+    p.add_argument("path", help="archivo de salida ('.gz' comprime csv/jflap)")
+    p.add_argument("--pegs", type=int, default=3, help="número de pilones (más de 3: Frame-Stewart)")
+    p.add_argument("--start", type=int, default=0, help="csv: primer paso")
+    p.add_argument("--stop", type=int, default=None, help="csv: paso final (excluido)")
+    p.add_argument("--step", type=int, default=1, help="csv: salto entre pasos")
+
+    p = sub.add_parser("validate", help="calificar secuencias de movimientos, una por línea")
+    p.add_argument("n", type=int, help="número de discos")
+    p.add_argument("path", nargs="?", default="-", help="archivo de secuencias ('-' = entrada estándar)")
+    p.add_argument("--workers", type=int, default=None, help="procesos (por defecto uno por CPU)")
+    p.add_argument("--chunk-size", type=int, default=256, help="secuencias por tarea")
+
+    p = sub.add_parser("benchmark", help="medir generación, exportación, validación y dibujo")
+    p.add_argument("ns", nargs="?", default="1-16", help="discos: '18', '1-20' o '5,10,15' (por defecto 1-16)")
+    p.add_argument("--cases", default=None, help="casos separados por comas: " + ",".join(BENCH_CASES))
+    p.add_argument("--repeat", type=int, default=1, help="repeticiones (se toma la mejor)")
+    p.add_argument("--no-memory", action="store_true", help="no medir memoria pico")
+    p.add_argument("--save", metavar="FILE", help="guardar resultados como línea base JSON")
+    p.add_argument("--compare", metavar="FILE", help="comparar con una línea base JSON")
+    p.add_argument("--threshold", type=float, default=0.2, help="regresión tolerada (0.2 = 20%%)")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point; returns the process exit code."""
+    args = _build_parser().parse_args(argv)
+    if args.command in (None, "gui"):
+        run_gui(getattr(args, "profile", None))
+        return 0
+    try:
+        return _run_command(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def _parse_ns(spec):
+    # '18', '1-20' or '5,10,15'
+    ns = []
+    for part in spec.split(","):
+        lo, _, hi = part.partition("-")
+        ns.extend(range(int(lo), int(hi or lo) + 1))
+    return ns
+
+
+def _run_benchmark_command(args):
+    cases = args.cases.split(",") if args.cases else None
+    for name in cases or ():
+        if name not in BENCH_CASES:
+            raise ValueError(f"caso desconocido: {name}")
+    out = sys.stdout
+    out.write(f"{'caso':<16}{'n':>4}{'segundos':>12}{'items/s':>14}{'pico MB':>10}\n")
+
+    def report(r):
+        peak = "" if r["peak_bytes"] is None else f"{r['peak_bytes'] / 1e6:.2f}"
+        out.write(f"{r['case']:<16}{r['n']:>4}{r['seconds']:>12.4f}{r['items_per_sec']:>14,.0f}{peak:>10}\n")
+        out.flush()
+
+    results = run_benchmarks(_parse_ns(args.ns), cases, args.repeat, not args.no_memory, report)
+    if args.save:
+        save_benchmarks(results, args.save)
+    if args.compare:
+        slower = compare_benchmarks(results, args.compare, args.threshold)
+        for case, n, base, now in slower:
+            out.write(f"REGRESIÓN {case} n={n}: {base:.4f} s -> {now:.4f} s\n")
+        return 1 if slower else 0
+    return 0
+
+
+def _cli_automata(args):
+    # three pegs are computed on demand; other variants must be stored
+    return AutomataHanoiMatricial(args.n, lazy=True if args.pegs == 3 else None, pegs=args.pegs)
+
+
+def _run_command(args):
+    out = sys.stdout
+    if args.command == "generate":
+        automata = _cli_automata(args)
+        out.write(f"Autómata generado para {args.n} discos.\n")
+        out.write(f"Estados: {len(automata.states)}\n")
+        out.write(f"Movimientos esperados: {len(automata.sequence)}\n")
+        if args.moves:
+            _write_chunked(out, (MOVE_LABELS[src][dst] + "\n" for _, src, dst in automata.iter_moves()))
+        return 0
+    if args.command == "export":
+        if args.format == "statespace":
+            if args.pegs != 3:
+                raise ValueError("statespace requires 3 pegs")
+            HanoiStateSpace(args.n).export_jflap(args.path)
+            return 0
+        automata = _cli_automata(args)
+        if args.format == "csv":
+            automata.export_csv(args.path, args.start, args.stop, args.step)
+        elif args.format == "jflap":
+            automata.export_jflap(args.path)
+        else:
+            automata.export_binary(args.path)
+        return 0
+    if args.command == "validate":
+        if args.path == "-":
+            lines = (line.rstrip("\n") for line in sys.stdin)
+            grades = grade_batch(args.n, lines, workers=args.workers, chunk_size=args.chunk_size)
+        else:
+            grades = grade_file(args.n, args.path, workers=args.workers, chunk_size=args.chunk_size)
+        out.write("line\tlegal\tsolved\toptimal\tmoves\tdeviation\tfirst_illegal\n")
+        total = solved = 0
+        for i, g in enumerate(grades, 1):
+            total += 1
+            solved += g.solved
+            first = "" if g.first_illegal is None else g.first_illegal
+            deviation = "" if g.deviation is None else g.deviation
+            out.write(f"{i}\t{int(g.legal)}\t{int(g.solved)}\t{int(g.optimal)}\t{g.moves}\t{deviation}\t{first}\n")
+        print(f"{solved}/{total} secuencias resuelven la torre", file=sys.stderr)
+        return 0
+    if args.command == "benchmark":
+        return _run_benchmark_command(args)
+    raise ValueError(f"comando desconocido: {args.command}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
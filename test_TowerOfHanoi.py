@@ -0,0 +1,877 @@
+"""Tests for TowerOfHanoi.py; run with `python -m pytest`."""
+
+import pytest
+
+import TowerOfHanoi as hanoi
+
+
+def reference_moves(n, src=0, dst=2, aux=1):
+    # textbook recursion, independent of the engines under test
+    if n == 0:
+        return []
+    return reference_moves(n - 1, src, aux, dst) + [(n, src, dst)] + reference_moves(n - 1, aux, dst, src)
+
+
+def apply(state, move):
+    # state after one (disk, src, dst) move, checking that it is legal
+    pegs = [list(peg) for peg in state]
+    disk, src, dst = move
+    assert pegs[src] and pegs[src][-1] == disk
+    assert not pegs[dst] or pegs[dst][-1] > disk
+    pegs[dst].append(pegs[src].pop())
+    return tuple(map(tuple, pegs))
+
+
+def reference_states(n):
+    states = [(tuple(range(n, 0, -1)), (), ())]
+    for move in reference_moves(n):
+        states.append(apply(states[-1], move))
+    return states
+
+
+def label(src, dst):
+    return f"{chr(65 + src)}->{chr(65 + dst)}"
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+@pytest.mark.parametrize("n", range(1, 9))
+def test_solution_matches_recursion(n, lazy):
+    automata = hanoi.AutomataHanoiMatricial(n, lazy=lazy)
+    assert list(automata.states) == reference_states(n)
+    assert list(automata.sequence) == [label(src, dst) for _, src, dst in reference_moves(n)]
+
+
+def test_lazy_views_index_and_slice():
+    automata = hanoi.AutomataHanoiMatricial(6, lazy=True)
+    states = reference_states(6)
+    moves = [label(src, dst) for _, src, dst in reference_moves(6)]
+    assert len(automata.states) == 64 and len(automata.sequence) == 63
+    assert automata.states[-1] == states[-1]
+    assert list(automata.states[3:20:4]) == states[3:20:4]
+    assert list(automata.sequence[::-7]) == moves[::-7]
+    with pytest.raises(IndexError):
+        automata.states[64]
+    with pytest.raises(IndexError):
+        automata.sequence[-64]
+
+
+def test_lazy_mode_for_large_n():
+    automata = hanoi.AutomataHanoiMatricial(40)
+    assert automata.lazy
+    assert len(automata.states) == 1 << 40
+    assert automata.states[0] == (tuple(range(40, 0, -1)), (), ())
+    assert automata.states[-1] == ((), (), tuple(range(40, 0, -1)))
+    # the largest disk moves once, halfway through
+    assert automata.sequence[(1 << 39) - 1] == "A->C"
+    assert automata.peg_of(40, (1 << 39) - 1) == 0 and automata.peg_of(40, 1 << 39) == 2
+
+
+@pytest.mark.parametrize("n", range(1, 9))
+def test_iter_moves_matches_recursion(n):
+    automata = hanoi.AutomataHanoiMatricial(n, lazy=True)
+    assert list(automata.iter_moves()) == reference_moves(n)
+    assert list(automata.iter_states()) == reference_states(n)
+
+
+def test_iter_windows():
+    automata = hanoi.AutomataHanoiMatricial(7, lazy=True)
+    assert list(automata.iter_moves(37, 90)) == reference_moves(7)[37:90]
+    assert list(automata.iter_states(37, 90)) == reference_states(7)[37:90]
+    assert list(automata.iter_states(200)) == []
+
+
+def test_iter_states_in_place():
+    automata = hanoi.AutomataHanoiMatricial(4, lazy=True)
+    seen = [tuple(map(tuple, pegs)) for pegs in automata.iter_states(snapshot=False)]
+    assert seen == reference_states(4)
+    pegs = list(automata.iter_states(snapshot=False))
+    assert all(p is pegs[0] for p in pegs)
+
+
+def test_pack_roundtrip():
+    for state in reference_states(6):
+        code = hanoi.pack_state(state)
+        assert code < 1 << 12
+        assert hanoi.unpack_state(code, 6) == state
+
+
+@pytest.mark.parametrize("n", [1, 5, 9])
+def test_packed_codes(n):
+    automata = hanoi.AutomataHanoiMatricial(n, lazy=False)
+    expected = [hanoi.pack_state(state) for state in reference_states(n)]
+    assert automata.codes.typecode == "Q"
+    assert list(automata.codes) == expected
+    assert list(automata.iter_codes()) == expected
+    assert [automata.code_at(i) for i in range(len(expected))] == expected
+    lazy = hanoi.AutomataHanoiMatricial(n, lazy=True)
+    assert list(lazy.iter_codes(3, 9)) == expected[3:9]
+
+
+def test_packed_states_lookup():
+    automata = hanoi.AutomataHanoiMatricial(5, lazy=False)
+    states = reference_states(5)
+    assert states[17] in automata.states
+    assert automata.states.index(states[17]) == 17
+    assert ((5, 4, 3, 1), (2,), ()) not in automata.states
+
+
+def all_states(n):
+    # every legal configuration of n disks
+    import itertools
+
+    for pegs in itertools.product(range(3), repeat=n):
+        state = ([], [], [])
+        for disk in range(n, 0, -1):
+            state[pegs[disk - 1]].append(disk)
+        yield tuple(map(tuple, state))
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+@pytest.mark.parametrize("n", range(1, 7))
+def test_index_of(n, lazy):
+    automata = hanoi.AutomataHanoiMatricial(n, lazy=lazy)
+    steps = {state: i for i, state in enumerate(reference_states(n))}
+    for state in all_states(n):
+        assert automata.index_of(state) == steps.get(state)
+        assert automata.index_of([list(peg) for peg in state]) == steps.get(state)
+        assert automata.index_of(hanoi.pack_state(state)) == steps.get(state)
+
+
+def test_index_of_rejects_invalid_states():
+    automata = hanoi.AutomataHanoiMatricial(3)
+    assert automata.index_of(((1, 2, 3), (), ())) is None
+    assert automata.index_of(((3, 2), (), ())) is None
+    assert automata.index_of(((3, 2, 1), (4,), ())) is None
+    assert automata.index_of("A->C") is None
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def backend(request, monkeypatch):
+    # run a test with and without the NumPy engine
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(hanoi, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("n", [1, 4, 10])
+def test_backends_build_the_same_solution(n, backend):
+    automata = hanoi.AutomataHanoiMatricial(n, lazy=False)
+    assert list(automata.codes) == [hanoi.pack_state(state) for state in reference_states(n)]
+
+
+@pytest.mark.parametrize("n", [1, 8])
+def test_solution_arrays(n, backend):
+    tables = hanoi.AutomataHanoiMatricial(n, lazy=True).solution_arrays()
+    moves = reference_moves(n)
+    assert list(tables.disk) == [disk for disk, _, _ in moves]
+    assert list(tables.src) == [src for _, src, _ in moves]
+    assert list(tables.dst) == [dst for _, _, dst in moves]
+    assert list(tables.codes) == [hanoi.pack_state(state) for state in reference_states(n)]
+    assert [list(row) for row in tables.pegs][-1] == [2] * n
+
+
+# sha256 of the files written by the original list-building exporters
+CSV_SHA256 = {
+    1: "b60f2e28bc3fcde4730580c954c915276ec493f16992aa04f5bfbacbea1ce4d1",
+    3: "2a1adeed4cf0b6465d7b00e1265295ac8fbcb257d8ddb2ddbca6aa7f2ba3ba88",
+    6: "9634296ec49e407dd35a1c35b8d802c3000f7432dcc83ca9506acec4bfbff969",
+}
+
+
+def sha256(data):
+    import hashlib
+
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+@pytest.mark.parametrize("n", sorted(CSV_SHA256))
+def test_export_csv_matches_original(tmp_path, n, lazy):
+    path = tmp_path / "states.csv"
+    hanoi.AutomataHanoiMatricial(n, lazy=lazy).export_csv(str(path), chunk_rows=5)
+    assert sha256(path.read_bytes()) == CSV_SHA256[n]
+
+
+def read_csv(path):
+    import csv
+
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def csv_row(i, state):
+    return [str(i)] + ["-".join(map(str, peg)) for peg in state]
+
+
+def test_export_csv_range(tmp_path):
+    automata = hanoi.AutomataHanoiMatricial(6, lazy=True)
+    states = reference_states(6)
+    path = str(tmp_path / "range.csv")
+    automata.export_csv(path, start=5, stop=40, step=3)
+    rows = read_csv(path)
+    assert rows[0] == ["index", "pegA", "pegB", "pegC"]
+    assert rows[1:] == [csv_row(i, states[i]) for i in range(5, 40, 3)]
+    automata.export_csv(path, start=50, stop=-2)
+    assert read_csv(path)[1:] == [csv_row(i, states[i]) for i in range(50, 62)]
+    automata.export_csv(path, start=70)
+    assert read_csv(path) == [["index", "pegA", "pegB", "pegC"]]
+    with pytest.raises(ValueError):
+        automata.export_csv(path, step=0)
+
+
+def test_export_csv_gzip(tmp_path):
+    import gzip
+
+    automata = hanoi.AutomataHanoiMatricial(6)
+    automata.export_csv(str(tmp_path / "states.csv"))
+    automata.export_csv(str(tmp_path / "states.csv.gz"))
+    automata.export_csv(str(tmp_path / "forced"), compress=True)
+    automata.export_csv(str(tmp_path / "plain.csv.gz"), compress=False)
+    plain = (tmp_path / "states.csv").read_bytes()
+    with gzip.open(tmp_path / "states.csv.gz", "rb") as f:
+        assert f.read() == plain
+    with gzip.open(tmp_path / "forced", "rb") as f:
+        assert f.read() == plain
+    assert (tmp_path / "plain.csv.gz").read_bytes() == plain
+
+
+JFLAP_SHA256 = {
+    1: "ad3f415f33ce0f51d10b2d15079f850776c72b551ed63b4cbc9f2603d5f5c252",
+    3: "afecf6b1506d94f8862bde443945359455cc51013951899d21b77133cf6ef8cd",
+    6: "463091fc4cc5db7536236212ac592cca6001ccaba7e842d5d80fef02ac58b467",
+}
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+@pytest.mark.parametrize("n", sorted(JFLAP_SHA256))
+def test_export_jflap_matches_original(tmp_path, n, lazy):
+    path = tmp_path / "automaton.jff"
+    hanoi.AutomataHanoiMatricial(n, lazy=lazy).export_jflap(str(path), chunk=7)
+    assert sha256(path.read_bytes()) == JFLAP_SHA256[n]
+
+
+def test_export_jflap_gzip(tmp_path):
+    import gzip
+
+    hanoi.AutomataHanoiMatricial(6).export_jflap(str(tmp_path / "automaton.jff.gz"))
+    with gzip.open(tmp_path / "automaton.jff.gz", "rb") as f:
+        assert sha256(f.read()) == JFLAP_SHA256[6]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jflap"])
+def test_benchmark_export(tmp_path, fmt):
+    result = hanoi.benchmark_export(5, fmt, str(tmp_path / "out"))
+    assert result["states"] == 32 and result["seconds"] >= 0
+    assert (tmp_path / "out").stat().st_size > 0
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_binary_roundtrip(tmp_path, lazy):
+    automata = hanoi.AutomataHanoiMatricial(7, lazy=lazy)
+    path = tmp_path / "solution.hanoi"
+    automata.export_binary(str(path), chunk=10)
+    # 2 bits per disk: 14 bits fit in 2-byte words
+    assert path.stat().st_size == hanoi.AutomataHanoiMatricial._BINARY_HEADER.size + 128 * 2
+    loaded = hanoi.AutomataHanoiMatricial.load_binary(str(path))
+    states = reference_states(7)
+    assert loaded.n == 7
+    assert list(loaded.states) == states
+    assert list(loaded.sequence) == [label(src, dst) for _, src, dst in reference_moves(7)]
+    assert loaded.index_of(states[50]) == 50
+
+
+def test_load_binary_rejects_other_files(tmp_path):
+    bad = tmp_path / "bad.hanoi"
+    bad.write_bytes(b"not a solution file at all")
+    with pytest.raises(ValueError):
+        hanoi.AutomataHanoiMatricial.load_binary(str(bad))
+    path = tmp_path / "solution.hanoi"
+    hanoi.AutomataHanoiMatricial(5).export_binary(str(path))
+    bad.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        hanoi.AutomataHanoiMatricial.load_binary(str(bad))
+
+
+def test_validate_moves_solution():
+    automata = hanoi.AutomataHanoiMatricial(5)
+    labels = list(automata.sequence)
+    codes = hanoi.encode_moves(labels)
+    for moves in (labels, codes, list(codes), iter(labels)):
+        check = automata.validate_moves(moves)
+        assert (check.ok, check.solved, check.count, check.first_illegal) == (True, True, 31, None)
+        assert check.trace is None
+    assert automata.validate_moves([" a -> c "]).ok
+
+
+def test_validate_moves_reports_first_illegal():
+    automata = hanoi.AutomataHanoiMatricial(3)
+    check = automata.validate_moves(["A->C"])
+    assert (check.ok, check.solved, check.count, check.first_illegal) == (True, False, 1, None)
+    check = automata.validate_moves(["A->C", "A->C"])  # disk 2 onto disk 1
+    assert (check.ok, check.solved, check.count, check.first_illegal) == (False, False, 1, 1)
+    assert "disco 2" in check.message
+    check = automata.validate_moves(["A->C", "B->A"])
+    assert (check.ok, check.first_illegal) == (False, 1)
+    assert "vacío" in check.message
+    assert automata.validate_moves(["A->C", "A-B"]).first_illegal == 1
+    assert automata.validate_moves([9]).first_illegal == 0
+
+
+def test_validate_moves_trace():
+    automata = hanoi.AutomataHanoiMatricial(6)
+    check = automata.validate_moves(hanoi.encode_moves(automata.sequence), trace=True)
+    assert check.trace == [hanoi.pack_state(state) for state in reference_states(6)[1:]]
+    check = automata.validate_moves(["A->B", "A->B"], trace=True)
+    assert check.first_illegal == 1
+    assert check.trace == [hanoi.pack_state(((6, 5, 4, 3, 2), (1,), ()))]
+
+
+def test_encode_moves():
+    assert hanoi.encode_moves(["A->C", "c->b"]) == bytes([2, 7])
+    with pytest.raises(ValueError):
+        hanoi.encode_moves(["A-C"])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_grade_batch_keeps_order(workers):
+    optimal = " ".join(hanoi.AutomataHanoiMatricial(4).sequence)
+    sequences = [optimal, "A->C", "A->B, A->B", "A->B B->A " + optimal] * 5
+    grades = list(hanoi.grade_batch(4, sequences, workers=workers, chunk_size=3))
+    assert len(grades) == len(sequences)
+    for i, grade in enumerate(grades):
+        kind = i % 4
+        if kind == 0:
+            assert grade == hanoi.Grade(True, True, True, 15, 0, None)
+        elif kind == 1:
+            assert (grade.legal, grade.solved, grade.moves, grade.first_illegal) == (True, False, 1, None)
+        elif kind == 2:
+            assert (grade.legal, grade.solved, grade.moves, grade.first_illegal) == (False, False, 1, 1)
+        else:
+            assert grade == hanoi.Grade(True, True, False, 17, 2, None)
+
+
+def test_grade_file(tmp_path):
+    path = tmp_path / "submissions.txt"
+    path.write_text("A->C A->B C->B A->C B->A B->C A->C\nA->C\n", encoding="utf-8")
+    grades = list(hanoi.grade_file(3, str(path), workers=1))
+    assert [(g.solved, g.optimal, g.moves) for g in grades] == [(True, True, 7), (False, False, 1)]
+
+
+def test_cli_generate(capsys):
+    assert hanoi.main(["generate", "3", "--moves"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1:3] == ["Estados: 8", "Movimientos esperados: 7"]
+    assert lines[3:] == [label(src, dst) for _, src, dst in reference_moves(3)]
+
+
+def test_cli_export(tmp_path):
+    automata = hanoi.AutomataHanoiMatricial(4)
+    for fmt in ("csv", "jflap"):
+        path = tmp_path / f"cli.{fmt}"
+        assert hanoi.main(["export", fmt, "4", str(path)]) == 0
+        getattr(automata, f"export_{fmt}")(str(tmp_path / f"api.{fmt}"))
+        assert path.read_bytes() == (tmp_path / f"api.{fmt}").read_bytes()
+    path = tmp_path / "range.csv"
+    assert hanoi.main(["export", "csv", "4", str(path), "--start", "2", "--stop", "12", "--step", "5"]) == 0
+    assert [row[0] for row in read_csv(path)] == ["index", "2", "7"]
+    path = tmp_path / "cli.hanoi"
+    assert hanoi.main(["export", "binary", "4", str(path)]) == 0
+    assert list(hanoi.AutomataHanoiMatricial.load_binary(str(path)).states) == reference_states(4)
+
+
+def test_cli_validate(tmp_path, capsys):
+    path = tmp_path / "submissions.txt"
+    path.write_text("A->C A->B C->B A->C B->A B->C A->C\nA->B A->B\n", encoding="utf-8")
+    assert hanoi.main(["validate", "3", str(path), "--workers", "1"]) == 0
+    captured = capsys.readouterr()
+    lines = [line.split("\t") for line in captured.out.splitlines()]
+    assert lines[0][0] == "line" and len(lines) == 3
+    assert lines[1][:5] == ["1", "1", "1", "1", "7"]
+    assert lines[2][:3] == ["2", "0", "0"] and lines[2][-1] == "1"
+    assert "1/2" in captured.err
+
+
+def test_cli_reports_errors(tmp_path, capsys):
+    assert hanoi.main(["generate", "0"]) == 1
+    assert hanoi.main(["export", "csv", "3", str(tmp_path / "missing" / "states.csv")]) == 1
+    assert capsys.readouterr().err.count("Error:") == 2
+
+
+def test_cli_runs_without_tkinter():
+    import os
+    import subprocess
+    import sys
+
+    code = ("import sys; sys.modules['tkinter'] = None; import TowerOfHanoi; "
+            "sys.exit(TowerOfHanoi.main(['generate', '3']))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(hanoi.__file__)),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Estados: 8" in result.stdout
+
+
+def test_run_benchmarks():
+    reported = []
+    results = hanoi.run_benchmarks([2, 3], ["build", "validate_moves", "simulate_manual"],
+                                   memory=False, report=reported.append)
+    assert reported == results
+    assert [(r["case"], r["n"], r["items"]) for r in results] == [
+        ("build", 2, 4), ("build", 3, 8), ("validate_moves", 2, 3), ("validate_moves", 3, 7),
+        ("simulate_manual", 2, 3), ("simulate_manual", 3, 7)]
+    assert all(r["seconds"] >= 0 and r["peak_bytes"] is None for r in results)
+    results = hanoi.run_benchmarks([3], ["export_csv"])
+    assert results[0]["peak_bytes"] > 0
+
+
+def test_compare_benchmarks(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    hanoi.save_benchmarks([{"case": "build", "n": 20, "seconds": 0.2},
+                           {"case": "build", "n": 5, "seconds": 0.0001}], path)
+    results = [{"case": "build", "n": 20, "seconds": 0.5},
+               {"case": "build", "n": 5, "seconds": 0.01},
+               {"case": "build", "n": 6, "seconds": 9.0}]
+    # n=5 is under the noise floor and n=6 has no baseline
+    assert hanoi.compare_benchmarks(results, path) == [("build", 20, 0.2, 0.5)]
+    assert hanoi.compare_benchmarks(results, path, threshold=2.0) == []
+
+
+def test_cli_benchmark(tmp_path, capsys):
+    import json
+
+    path = tmp_path / "baseline.json"
+    assert hanoi.main(["benchmark", "3-4", "--cases", "build", "--no-memory", "--save", str(path)]) == 0
+    assert [(r["case"], r["n"]) for r in json.loads(path.read_text())["results"]] == [("build", 3), ("build", 4)]
+    assert "build" in capsys.readouterr().out
+    assert hanoi.main(["benchmark", "3", "--cases", "nope"]) == 1
+
+
+def test_profiler_times_methods(tmp_path):
+    import json
+
+    class Target:
+        def work(self, x):
+            return x * 2
+
+    target, other = Target(), Target()
+    profiler = hanoi.Profiler()
+    profiler.attach(target, ["work", "missing"])
+    assert target.work(3) == 6 and other.work(1) == 2
+    profiler.record("slow", 1.0)
+    snap = profiler.snapshot()
+    assert sorted(snap["callbacks"]) == ["slow", "work"]
+    assert snap["callbacks"]["work"]["count"] == 1
+    assert sum(snap["callbacks"]["work"]["hist"].values()) == 1
+    assert snap["callbacks"]["slow"]["hist"][">66ms"] == 1
+    assert snap["callbacks"]["slow"]["max_ms"] == 1000
+    assert any(line.startswith("work: n=1") for line in profiler.summary_lines())
+    path = tmp_path / "profile.json"
+    profiler.dump(str(path))
+    assert json.loads(path.read_text()) == json.loads(json.dumps(snap))
+
+
+def test_frame_stewart_numbers():
+    assert [hanoi.FrameStewart.moves(n, 4) for n in range(1, 11)] == [1, 3, 5, 9, 13, 17, 25, 33, 41, 49]
+    assert [hanoi.FrameStewart.moves(n, 3) for n in range(1, 11)] == [(1 << n) - 1 for n in range(1, 11)]
+    # with a free peg for every disk each one moves out and back except the largest
+    assert hanoi.FrameStewart.moves(5, 8) == 9
+
+
+@pytest.mark.parametrize("n,pegs", [(1, 4), (6, 4), (8, 4), (7, 5), (5, 8)])
+def test_frame_stewart_solves(n, pegs):
+    automata = hanoi.AutomataHanoiMatricial(n, pegs=pegs)
+    check = automata.validate_moves(list(automata.sequence))
+    assert check.solved and check.count == hanoi.FrameStewart.moves(n, pegs)
+    state = automata.states[0]
+    assert state == (tuple(range(n, 0, -1)),) + ((),) * (pegs - 1)
+    for i, move in enumerate(automata.iter_moves(), 1):
+        state = apply(state, move)
+        assert state == automata.states[i]
+    assert state == ((),) * (pegs - 1) + (tuple(range(n, 0, -1)),)
+    assert [automata.index_of(st) for st in automata.states] == list(range(len(automata.states)))
+
+
+def test_frame_stewart_binary_roundtrip(tmp_path):
+    automata = hanoi.AutomataHanoiMatricial(7, pegs=5)
+    path = str(tmp_path / "solution.hanoi")
+    automata.export_binary(path)
+    loaded = hanoi.AutomataHanoiMatricial.load_binary(path)
+    assert (loaded.n, loaded.pegs) == (7, 5)
+    assert list(loaded.states) == list(automata.states)
+    assert list(loaded.sequence) == list(automata.sequence)
+
+
+def test_peg_count_limits():
+    with pytest.raises(ValueError):
+        hanoi.AutomataHanoiMatricial(3, pegs=hanoi.MAX_PEGS + 1)
+    with pytest.raises(ValueError):
+        hanoi.AutomataHanoiMatricial(3, pegs=4, lazy=True)
+
+
+@pytest.mark.parametrize("n", range(1, 6))
+def test_state_space_transitions(n, backend):
+    space = hanoi.HanoiStateSpace(n)
+    assert space.size == 3 ** n and len(space.offsets) == space.size + 1
+    assert len(space.targets) == len(space.labels) == 3 * space.size - 3
+    for i in range(space.size):
+        state = space.state_of(i)
+        assert space.id_of(state) == i
+        expected = []
+        for src in range(3):
+            for dst in range(3):
+                if state[src] and src != dst and (not state[dst] or state[dst][-1] > state[src][-1]):
+                    moved = apply(state, (state[src][-1], src, dst))
+                    expected.append((space.id_of(moved), label(src, dst)))
+        assert sorted(space.neighbors(i)) == sorted(expected)
+
+
+def test_state_space_distances(backend):
+    space = hanoi.HanoiStateSpace(5)
+    dist = space.distances
+    assert dist[space.start] == 31 and dist[space.goal] == 0 and max(dist) == 31
+    assert [dist[space.id_of(state)] for state in reference_states(5)] == list(range(31, -1, -1))
+
+
+def test_state_space_jflap_is_well_formed(tmp_path):
+    import gzip
+    import xml.etree.ElementTree as ET
+
+    space = hanoi.HanoiStateSpace(4)
+    space.export_jflap(str(tmp_path / "space.jff"), chunk=7)
+    space.export_jflap(str(tmp_path / "space.jff.gz"))
+    with gzip.open(tmp_path / "space.jff.gz", "rb") as f:
+        assert f.read() == (tmp_path / "space.jff").read_bytes()
+    root = ET.parse(tmp_path / "space.jff").getroot()
+    assert root.tag == "structure" and root.findtext("type") == "fa"
+    states = root.findall("automaton/state")
+    transitions = root.findall("automaton/transition")
+    assert [s.get("id") for s in states] == [str(i) for i in range(81)]
+    assert [s.get("id") for s in states if s.find("initial") is not None] == ["0"]
+    assert [s.get("id") for s in states if s.find("final") is not None] == ["80"]
+    assert all(s.findtext("x") and s.findtext("y") for s in states)
+    assert len(transitions) == 3 * 81 - 3
+    edges = {(int(t.findtext("from")), int(t.findtext("to")), t.findtext("read")) for t in transitions}
+    assert edges == {(i, j, move) for i in range(81) for j, move in space.neighbors(i)}
+
+
+def test_state_space_size_limits():
+    with pytest.raises(ValueError):
+        hanoi.HanoiStateSpace(0)
+    with pytest.raises(ValueError):
+        hanoi.HanoiStateSpace(hanoi.HanoiStateSpace.MAX_DISKS + 1)
+
+
+@pytest.mark.parametrize("n", range(1, 7))
+def test_oracle_matches_bfs(n):
+    space = hanoi.HanoiStateSpace(n)
+    automata = hanoi.AutomataHanoiMatricial(n)
+    dist = space.distances
+    goal = ((), (), tuple(range(n, 0, -1)))
+    for i in range(space.size):
+        state = space.state_of(i)
+        assert automata.distance_to_goal(state) == dist[i]
+        assert automata.distance_to_goal(hanoi.pack_state(state)) == dist[i]
+        move = automata.next_move(state)
+        if dist[i] == 0:
+            assert move is None and list(automata.solve_from(state)) == []
+            continue
+        assert dist[space.id_of(apply(state, move))] == dist[i] - 1
+        moves = list(automata.solve_from(state))
+        assert len(moves) == dist[i] and moves[0] == move
+        for mv in moves:
+            state = apply(state, mv)
+        assert state == goal
+
+
+def test_oracle_on_more_pegs():
+    automata = hanoi.AutomataHanoiMatricial(5, pegs=4)
+    moves = list(automata.iter_moves())
+    last = len(automata.states) - 1
+    for i, state in enumerate(automata.states):
+        assert automata.distance_to_goal(state) == last - i
+        assert automata.next_move(state) == (moves[i] if i < last else None)
+        assert list(automata.solve_from(state)) == moves[i:]
+    off_path = ((5, 4, 3), (1,), (2,), ())
+    assert automata.index_of(off_path) is None
+    with pytest.raises(ValueError):
+        automata.next_move(off_path)
+
+
+def test_oracle_rejects_invalid_states():
+    automata = hanoi.AutomataHanoiMatricial(3)
+    for state in (((1, 2, 3), (), ()), ((3, 2), (), ()), ((3, 2, 1), (4,), ())):
+        with pytest.raises(ValueError):
+            automata.distance_to_goal(state)
+        with pytest.raises(ValueError):
+            automata.next_move(state)
+
+
+@pytest.mark.parametrize("n", [2, 6, 10])
+def test_derived_solutions(n, backend):
+    expected = [hanoi.pack_state(state) for state in reference_states(n)]
+    cache = hanoi.SolutionCache()
+    cache.get(n - 1)
+    assert list(cache.get(n).codes) == expected
+    cache = hanoi.SolutionCache()
+    cache.get(n + 1)
+    assert list(cache.get(n).codes) == expected
+    assert cache.stats()["derived"] == 1
+
+
+def test_solution_cache_lru():
+    cache = hanoi.SolutionCache(max_entries=2)
+    three = cache.get(3)
+    assert cache.get(3) is three
+    five = cache.get(5)
+    cache.get(3)
+    cache.get(7)  # evicts 5, the least recently used
+    assert cache.get(3) is three
+    assert cache.get(5) is not five
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 4, 2)
+    assert stats["bytes"] == (8 + 32) * 8
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "derived": 0, "entries": 0, "bytes": 0}
+
+
+def test_solution_cache_byte_limit():
+    cache = hanoi.SolutionCache(max_bytes=1000)
+    cache.get(6)  # 64 codes of 8 bytes
+    cache.get(7)  # 128 more: over the limit, the older entry goes
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 1024
+    # the newest entry is kept even when it alone exceeds the limit
+    cache.get(8)
+    assert cache.stats()["entries"] == 1
+
+
+def test_build_progress_and_cancel(backend):
+    calls = []
+    hanoi.AutomataHanoiMatricial(12, lazy=False, progress=lambda done, total: calls.append((done, total)))
+    assert calls[-1] == (4096, 4096)
+
+    def cancel(done, total):
+        raise hanoi.JobCancelled()
+    with pytest.raises(hanoi.JobCancelled):
+        hanoi.AutomataHanoiMatricial(12, lazy=False, progress=cancel)
+
+
+@pytest.mark.parametrize("export", ["export_csv", "export_jflap", "export_binary"])
+def test_export_progress(tmp_path, export):
+    automata = hanoi.AutomataHanoiMatricial(9)
+    calls = []
+    getattr(automata, export)(str(tmp_path / "out"), progress=lambda done, total: calls.append((done, total)))
+    assert calls and calls[-1][0] == calls[-1][1]
+
+    def cancel(done, total):
+        raise hanoi.JobCancelled()
+    with pytest.raises(hanoi.JobCancelled):
+        getattr(automata, export)(str(tmp_path / "out"), progress=cancel)
+
+
+class FakeRoot:
+    # collects root.after callbacks so a test can run them in order
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def run(self):
+        import time
+
+        while self.pending:
+            time.sleep(0.002)
+            self.pending.pop(0)()
+
+
+def test_job_runner():
+    import time
+
+    root = FakeRoot()
+    runner = hanoi.JobRunner(root)
+    events = []
+
+    def work(progress):
+        progress(1, 2)
+        progress(2, 2)
+        return 42
+    assert runner.start(work, on_progress=lambda done, total, elapsed: events.append((done, total)),
+                        on_done=events.append)
+    assert runner.busy and not runner.start(work)
+    root.run()
+    assert not runner.busy and events[-1] == 42 and (2, 2) in events
+
+    def endless(progress):
+        while True:
+            progress(0, 1)
+            time.sleep(0.001)
+    runner.start(endless, on_cancel=lambda: events.append("cancelled"))
+    runner.cancel()
+    root.run()
+    assert events[-1] == "cancelled"
+
+    runner.start(lambda progress: 1 / 0, on_error=events.append)
+    root.run()
+    assert isinstance(events[-1], ZeroDivisionError)
+
+
+class FakeWidget:
+    # accepts and ignores every Tk widget call
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class FakeText(FakeWidget):
+    # the part of tk.Text that SequenceLog edits: whole lines and tags
+    def __init__(self, *args, **kwargs):
+        self.content = ""
+        self.tags = {}
+
+    def insert(self, index, text):
+        self.content = self.content + text if index == "end" else text + self.content
+
+    def delete(self, start, end):
+        if end == "2.0":
+            self.content = self.content.partition("\n")[2]
+        else:
+            self.content = ""
+
+    def tag_add(self, tag, start, end):
+        self.tags[tag] = int(start.split(".")[0])
+
+    def tag_remove(self, tag, start, end):
+        self.tags.pop(tag, None)
+
+    def lines(self):
+        return self.content.splitlines()
+
+
+@pytest.fixture
+def fake_tk(monkeypatch):
+    import types
+
+    monkeypatch.setattr(hanoi, "tk", types.SimpleNamespace(Text=FakeText, END="end"))
+    monkeypatch.setattr(hanoi, "ttk", types.SimpleNamespace(Frame=FakeWidget, Scrollbar=FakeWidget))
+
+
+def test_sequence_log_bounds_events(fake_tk):
+    log = hanoi.SequenceLog(None)
+    for i in range(250):
+        log.log(f"evento\n{i}")
+    log.log("   ")
+    assert list(log.events) == [f"evento {i}" for i in range(50, 250)]
+    assert log.text_events.lines() == list(log.events)
+    log.clear_events()
+    assert not log.events and log.text_events.lines() == []
+
+
+def test_sequence_log_renders_visible_rows(fake_tk):
+    log = hanoi.SequenceLog(None, rows=8)
+    moves = hanoi.AutomataHanoiMatricial(30).sequence
+    log.set_data(moves)
+    rows = [line.split() for line in log.text_rows.lines()]
+    assert rows == [[f"{i + 1}.", moves[i]] for i in range(8)]
+    log.set_current(123456788)
+    assert log.first == 123456788 - 4
+    assert log.text_rows.lines()[4].split() == ["123456789.", moves[123456788]]
+    assert log.text_rows.tags["current"] == 5
+    log.set_current(123456790)  # still in view: only the tag moves
+    assert log.first == 123456788 - 4 and log.text_rows.tags["current"] == 7
+    log._on_scroll("moveto", "1.0")
+    assert log.first == len(moves) - 8 and "current" not in log.text_rows.tags
+    assert log.text_rows.lines()[-1].split() == [f"{len(moves)}.", moves[-1]]
+    log._on_scroll("scroll", "-1", "pages")
+    assert log.first == len(moves) - 16
+    log.set_current(None)
+    assert "current" not in log.text_rows.tags
+
+
+def test_validate_moves_numpy_codes():
+    np = pytest.importorskip("numpy")
+    automata = hanoi.AutomataHanoiMatricial(5)
+    tables = automata.solution_arrays()
+    codes = tables.src.astype(np.int64) * 3 + tables.dst
+    assert automata.validate_moves(codes).solved
+    assert automata.validate_moves(codes.astype(np.uint8)).solved
+    assert automata.validate_moves(list(codes)).solved  # NumPy scalars
+    check = automata.validate_moves(codes[::-1])
+    assert not check.ok and check.first_illegal == 1
+
+
+def test_render_benchmark_skipped_without_tkinter(monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "tkinter", None)
+    monkeypatch.setattr(hanoi, "tk", None)
+    assert hanoi._bench_render(3) is None
+
+
+@pytest.mark.parametrize("block", [1, 7, 100])
+def test_state_space_blocks(block):
+    pytest.importorskip("numpy")
+    space = hanoi.HanoiStateSpace(4)
+    offsets, targets, labels = (list(a) for a in space._np_build(block))
+    assert (offsets, targets, labels) == (list(space.offsets), list(space.targets), list(space.labels))
+
+
+def test_profiler_samples_canvas_on_ticks():
+    import types
+
+    scheduler = types.SimpleNamespace(_tick=lambda: None, _next_frame=0.0, dropped_frames=2)
+    canvas = types.SimpleNamespace(find_all=lambda: (1, 2, 3))
+    profiler = hanoi.Profiler()
+    profiler.attach_scheduler(scheduler, canvas)
+    scheduler._tick()
+    snap = profiler.snapshot()
+    assert snap["canvas_items"] == snap["max_canvas_items"] == 3
+    assert snap["dropped_frames"] == 2
+    assert snap["callbacks"]["scheduler._tick"]["count"] == 1
+
+
+def test_grade_deviation_only_when_solved():
+    grades = hanoi.grade_batch(3, ["A->C A->B", "A->B A->B", "A->C A->B C->B A->C B->A B->C A->C"], workers=1)
+    assert [g.deviation for g in grades] == [None, None, 0]
+
+
+def test_sequence_log_many_skips_blanks(fake_tk):
+    log = hanoi.SequenceLog(None)
+    log.log_many(["uno", "", "  ", "dos"] + [f"m{i}" for i in range(210)])
+    assert len(log.events) == 200 and log.events[0] == "m10"
+    log.log("tres")
+    assert log.text_events.lines() == list(log.events)
+
+
+def test_oracle_rejects_invalid_codes():
+    automata = hanoi.AutomataHanoiMatricial(3)
+    for code in (0b11, 0b110000, 0b111111, 1 << 6):
+        assert automata.index_of(code) is None
+        with pytest.raises(ValueError):
+            automata.next_move(code)
+        with pytest.raises(ValueError):
+            automata.distance_to_goal(code)
+        with pytest.raises(ValueError):
+            list(automata.solve_from(code))
+
+
+def test_lazy_mode_disk_limit(tmp_path, capsys):
+    limit = hanoi.AutomataHanoiMatricial.MAX_LAZY_DISKS
+    automata = hanoi.AutomataHanoiMatricial(limit)
+    assert len(automata.states) == 1 << limit and len(automata.sequence) == (1 << limit) - 1
+    with pytest.raises(ValueError):
+        hanoi.AutomataHanoiMatricial(limit + 1)
+    assert hanoi.main(["generate", "64"]) == 1
+    assert hanoi.main(["export", "csv", "64", str(tmp_path / "states.csv"), "--stop", "5"]) == 1
+    assert capsys.readouterr().err.count("Error:") == 2
+
+
+def test_export_benchmarks_count_states(tmp_path):
+    results = hanoi.run_benchmarks([3], ["export_csv", "export_jflap"], memory=False)
+    assert [r["items"] for r in results] == [8, 8]
+    path = tmp_path / "states.csv"
+    assert hanoi.benchmark_export(3, "csv", str(path))["states"] == 8
+    hanoi.AutomataHanoiMatricial(3).export_csv(str(tmp_path / "api.csv"))
+    assert path.read_bytes() == (tmp_path / "api.csv").read_bytes()